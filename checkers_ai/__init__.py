@@ -0,0 +1,26 @@
+# Checkers engine: positions and move generation (Bitboard), games with the
+#   draw rules (GameHistory) and the search (AI).
+#
+#   board = Bitboard()                    # or Bitboard((black, white, kings, side))
+#   history = GameHistory(board)
+#   move = AI(timelimit=1, verbose=False).iddfs(board, history.keys)
+#   history.play(board, move)
+#
+# Only the engine modules are loaded by these names. The board display, the
+#   tools and the optional dependencies are imported when first used, see
+#   bench.IMPORT_BUDGET.
+
+__all__ = ['Bitboard', 'GameHistory', 'AI', 'SearchResult', 'SearchTimeout', 'SearchStats']
+
+# Module of each name above, imported on first access, so running one of
+#   the modules with python -m does not import it a second time
+_MODULES = dict(Bitboard='checkers', GameHistory='checkers', AI='ai', SearchResult='ai',
+        SearchTimeout='ai', SearchStats='stats')
+
+def __getattr__(name):
+    if name not in _MODULES:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    from importlib import import_module
+    value = getattr(import_module('.' + _MODULES[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,5 @@
+# python -m checkers_ai plays the interactive game
+from .game import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1004 @@
+import collections
+import random
+import time
+from .checkers import (Bitboard, TERM_MASK, WHITE_PIECES, BLACK_KINGS, WHITE_KINGS,
+        BLACK_ADVANCED, WHITE_ADVANCED, BLACK_CENTER_KINGS, WHITE_CENTER_KINGS,
+        BLACK_BACK_RANK, WHITE_BACK_RANK, BLACK_CORNERS, WHITE_CORNERS)
+from .transposition import TranspositionTable
+from .tablebase import Tablebase, WIN, LOSS
+from .stats import SearchStats
+
+# Evaluation tables, built at import so a leaf evaluation is a few lookups.
+
+def square_coordinates(square):
+    # (rank, file) of a square. Even ranks hold the odd files.
+    rank, index = divmod(square, 4)
+    return rank, index * 2 + 1 if (1 << square) & 0x0f0f0f0f else index * 2
+
+def build_distances():
+    # SQUARE_DISTANCE[a][b]: ranks plus files between squares a and b
+    coordinates = [square_coordinates(square) for square in range(32)]
+    return [[abs(r1 - r2) + abs(f1 - f2) for r2, f2 in coordinates] for r1, f1 in coordinates]
+
+SQUARE_DISTANCE = build_distances()
+
+# Patterns of a side's home corner: its back rank and the rank in front of
+#   it. A bridge is the side's pieces on the back rank squares two apart
+#   next to the double corner, which keep the opponent from crowning there.
+#   The dog-hole is the square next to the double corner on the rank in
+#   front of it: an opponent man there is stuck while the side holds the
+#   corner square behind it.
+BRIDGE, DOG_HOLE = 15, 10
+BRIDGE_MASKS = (0x00000005, 0xa0000000)
+# (dog-hole, corner square behind it) of each side's home corner
+DOG_HOLE_MASKS = ((0x00000010, 0x00000001), (0x08000000, 0x80000000))
+# Back rank and the rank in front of it of each side
+HOME_RANKS = ((0, 1), (7, 6))
+
+def build_home_patterns():
+    # HOME_PATTERNS[side][index]: pattern score of the side's home corner,
+    #   indexed by the 4-bit occupancy of its back rank by its own pieces
+    #   plus, in the high 4 bits, the occupancy of the rank in front by the
+    #   opponent's men
+    tables = []
+    for side in (Bitboard.BLACK, Bitboard.WHITE):
+        back, front = HOME_RANKS[side]
+        hole, corner = DOG_HOLE_MASKS[side]
+        table = []
+        for index in range(256):
+            own = (index & 0xf) << (4 * back)
+            opponent_men = (index >> 4) << (4 * front)
+            value = 0
+            if own & BRIDGE_MASKS[side] == BRIDGE_MASKS[side]:
+                value += BRIDGE
+            if opponent_men & hole and own & corner:
+                value += DOG_HOLE
+            table.append(value)
+        tables.append(table)
+    return tables
+
+HOME_PATTERNS = build_home_patterns()
+
+# One result of the anytime search, see AI.iterations: the best move and
+#   score of the deepest completed iteration and its depth, the principal
+#   variation starting with the move, and the nodes and seconds searched so
+#   far. source is how the move was found, as in SearchStats.
+SearchResult = collections.namedtuple('SearchResult', 'move score depth pv nodes seconds source')
+
+class SearchTimeout(Exception):
+    # Raised inside the search when its time or node budget runs out
+    pass
+
+class AI:
+    # Searches selectable with the search option
+    SEARCHES = ('pvs', 'minimax')
+
+    # Half width of the first aspiration window around the last iteration's
+    #   score, and the width of the null windows used by PVS
+    ASPIRATION_WINDOW = 25
+    NULL_WINDOW = 1e-3
+
+    # Bounds on the predicted growth in time from one iteration to the next
+    MIN_GROWTH, MAX_GROWTH = 1.5, 4
+
+    # Deepest iteration. Table depths are signed bytes and COMPLETE marks
+    #   finished subtrees, so deeper iterations, reached quickly in small
+    #   king endgames, cannot be stored.
+    MAX_DEPTH = TranspositionTable.COMPLETE - 1
+
+    # Most nodes a ponder search visits before the ponder hits, so one left
+    #   running when the game ends without another search stops on its own
+    PONDER_NODES = 2000000
+
+    # Score of a tablebase win, less the plies it takes. Larger than any
+    #   heuristic evaluation.
+    TABLEBASE_WIN = 10000
+
+    def __init__(self, timelimit=5, table_mb=16, search='pvs', depth=None, quiescence_depth=12,
+            nodelimit=None, check_every=256, workers=1, batch_eval=False, tablebase=None,
+            book=None, stats_log=None, move_ordering=True, verbose=True):
+        if search not in self.SEARCHES:
+            raise ValueError('Unknown search {!r}, expected one of {}'.format(search, self.SEARCHES))
+        # Seconds per move, fractions allowed, None for no time limit. 0
+        #   completes the first iteration only.
+        self.timelimit = timelimit
+        self.search = search
+        # Optional fixed depth and per move node limits, the search stops at
+        #   whichever of the limits is reached first
+        self.depth = depth
+        self.nodelimit = nodelimit
+        # Limits are checked every check_every nodes
+        self.check_every = check_every
+        # Forced jump sequences are followed past the depth limit for at most
+        #   this many plies, 0 evaluates at the depth limit directly
+        self.quiescence_depth = quiescence_depth
+        # Order the moves of interior nodes by killer moves and the history
+        #   heuristic, after the hash move. killers[ply] holds the last two
+        #   simple moves that caused a beta cutoff at that distance from the
+        #   root, history the cutoffs of each simple move by from square * 32
+        #   + to square, weighted by depth squared.
+        self.move_ordering = move_ordering
+        self.killers = []
+        self.history = [0] * 1024
+        # Score the quiet children of nodes one ply above the depth limit
+        #   with the numpy batch evaluator
+        self.batch_eval = batch_eval
+        # Endgame tablebases, a Tablebase or the directory they were
+        #   generated in, probed in evaluate and at every search node
+        if isinstance(tablebase, str):
+            tablebase = Tablebase(tablebase)
+        self.tablebase = tablebase
+        # Opening book probed before searching, an OpeningBook or the path
+        #   of a book file
+        if isinstance(book, str):
+            from .book import OpeningBook
+            book = OpeningBook(book)
+        self.book = book
+        # Number of processes searching each move, helper processes are
+        #   started on the first search and share the transposition table
+        self.workers = workers
+        self.helpers = []
+        self.helper_nodes = 0
+        # Event that stops the search when set, checked with the limits
+        self.stop = None
+        # Background search of the position after the opponent's expected
+        #   reply, see ponder
+        self.pondering = False
+        self.ponder_thread = None
+        self.ponder_key = self.ponder_move = None
+        # Keys of the game history and the current search path, positions
+        #   the search scores as draws when it reaches them again
+        self.repetitions = set()
+        self.verbose = verbose
+        # File, or path of a file to append to, that gets a JSON line for
+        #   every iteration and every search, see SearchStats.write
+        self.stats_log = stats_log
+        # Called with the SearchStats record of every completed iteration,
+        #   while the search goes on
+        self.on_iteration = None
+        self.stats = SearchStats()
+        self.reset_stats()
+        # Kept for the lifetime of the AI, so results carry over between
+        #   iterations and between moves of a game
+        self.transposition = TranspositionTable(table_mb, shared=workers > 1)
+
+    def reset_stats(self):
+        # nodes: interior and depth limit nodes of the main search
+        # qnodes: nodes visited by the quiescence search
+        # qdepth: deepest quiescence extension reached, in plies
+        # qcapped: quiescence searches stopped at quiescence_depth
+        # tbhits: search nodes scored from the tablebases
+        # evaluations: leaf evaluations
+        # cutoffs, first_cutoffs: beta cutoffs, and those by the first move
+        #   searched at the node
+        # The last three are counted in __debug__ blocks, so running python
+        #   with -O takes them out of the search and leaves them at 0.
+        self.nodes = self.qnodes = self.qdepth = self.qcapped = self.tbhits = 0
+        self.evaluations = self.cutoffs = self.first_cutoffs = 0
+
+    def counters(self):
+        # Totals of the counters SearchStats tracks, in its order
+        return self.nodes, self.qnodes, self.evaluations, self.cutoffs, self.first_cutoffs, self.tbhits
+
+    def check_limits(self):
+        # Called every check_every nodes, stops the search once the deadline
+        #   or the node limit is reached
+        if self.nodelimit and self.nodes >= self.nodelimit:
+            raise SearchTimeout('node limit reached')
+        if self.deadline is not None and time.time() >= self.deadline:
+            raise SearchTimeout('time limit reached')
+        if self.stop is not None and self.stop.is_set():
+            raise SearchTimeout('search stopped')
+        if self.pondering and self.nodes >= self.PONDER_NODES:
+            raise SearchTimeout('ponder node limit reached')
+        self.next_check = self.nodes + self.check_every
+        if self.nodelimit:
+            self.next_check = min(self.next_check, self.nodelimit)
+
+    def iddfs(self, board, history=()):
+        # iterative deepening depth first search. history: keys of the
+        #   positions of the game since the last capture or man move, which
+        #   the search scores as draws when it reaches them again. Returns
+        #   the move of the last of its iterations.
+        result = None
+        for result in self.iterations(board, history):
+            pass
+        return result.move if result else None
+
+    def iterations(self, board, history=()):
+        # Anytime form of iddfs: a generator of a SearchResult for every
+        #   completed iteration, each deeper than the last. The search runs
+        #   while the caller waits for the next result, so the caller can
+        #   show each one as it comes and stop iterating whenever it likes,
+        #   playing the last move it got. The limits and stop end it as they
+        #   end iddfs. Book, forced and ponder moves give a single result,
+        #   with no legal move that result's move is None.
+        if self.ponder_thread:
+            import threading
+            if self.ponder_thread is not threading.current_thread():
+                move = self.stop_pondering(board)
+                if move is not None:
+                    yield self.result(board, move)
+                    return
+        self.start = time.time()
+        # No deadline while pondering, it is set once the ponder hits
+        self.deadline = self.start + self.timelimit if self.timelimit is not None and not self.pondering else None
+        self.next_check = min(self.check_every, self.nodelimit or self.check_every)
+
+        # Search walks the tree with make/unmake on a private copy
+        board = board.copy()
+        # Keys of the game history and of the current search path
+        self.repetitions = set(history)
+        self.repetitions.add(board.key)
+        self.transposition.new_search()
+        self.reset_stats()
+        self.stats = SearchStats()
+        self.maxdepth = 1
+        self.completed, self.score = 0, None
+        # Killers are for this position only, history counts fade by half
+        #   every move
+        self.killers = []
+        self.history = [count >> 1 for count in self.history]
+        self.side = board.side
+
+        moves = board.get_moves()
+        move = self.book.probe(board, moves) if self.book and len(moves) > 1 else None
+        try:
+            if len(moves) <= 1:
+                self.stats.source = 'forced'
+                move = moves[0] if moves else None
+                yield self.result(board, move)
+            elif move:
+                self.stats.source = 'book'
+                self.maxdepth = 0
+                if self.verbose:
+                    print('  Book move')
+                yield self.result(board, move)
+            else:
+                search = self.parallel_search(board, moves) if self.workers > 1 else self.iterate(board, moves)
+                move = None
+                try:
+                    for move in search:
+                        yield self.result(board, move)
+                finally:
+                    # Stops the helpers of a parallel search the caller left
+                    search.close()
+                    self.stats.helper_nodes = self.helper_nodes
+                if move is None:
+                    # The first iteration did not finish in time
+                    move = moves[0]
+                    yield self.result(board, move)
+                if self.verbose and not self.pondering:
+                    print('  Search depth reached: ', self.maxdepth)
+        finally:
+            self.stats.seconds = time.time() - self.start
+            self.stats.move = move
+            if self.stats_log:
+                self.stats.write(self.stats_log)
+
+    def result(self, board, move):
+        # SearchResult for move, found by the search so far
+        return SearchResult(move, self.score, self.completed, self.principal_variation(board, move),
+                self.nodes, time.time() - self.start, self.stats.source)
+
+    def principal_variation(self, board, move):
+        # The line the search expects after board: move, then the best move
+        #   the transposition table holds for each following position, for
+        #   at most the depth of the last completed iteration
+        pv = []
+        board = board.copy()
+        seen = set()
+        while move is not None and len(pv) < max(self.completed, 1) and board.key not in seen:
+            seen.add(board.key)
+            pv.append(move)
+            board.make_move(move)
+            entry = self.transposition.probe(board.key)
+            move = entry[3] if entry and entry[3] in board.get_moves() else None
+        return pv
+
+    def deepen(self, board, moves, depth=1):
+        # The iterative deepening loop, starting at depth. Returns the move
+        #   of the last completed iteration, whose depth and score are left
+        #   in self.completed and self.score.
+        move = moves[0]
+        for move in self.iterate(board, moves, depth):
+            pass
+        return move
+
+    def iterate(self, board, moves, depth=1):
+        # The iterative deepening loop as a generator of the best move of
+        #   each completed iteration, see deepen
+        self.maxdepth = depth
+        self.completed, self.score = 0, None
+
+        # Used if the first iteration does not finish in time
+        move = moves[0]
+        try:
+            # Set to 0 when game tree fully explored
+            self.unexplored = 1
+            score = None
+            previous = None
+            while self.unexplored:
+                iteration_start = time.time()
+                while len(self.killers) <= self.maxdepth:
+                    self.killers.append([0, 0])
+                if self.search == 'pvs':
+                    scores = self.aspiration(board, moves, self.maxdepth, score)
+                else:
+                    scores = self.minimax(board, moves, self.maxdepth)
+                # Best first, ties keep their previous order
+                order = sorted(range(len(scores)), key=lambda i: -scores[i])
+                selected = order[0]
+                move = moves[selected]
+                score = scores[selected]
+                moves = [moves[i] for i in order]
+                self.completed, self.score = self.maxdepth, score
+
+                duration = time.time() - iteration_start
+                iteration = self.stats.add_iteration(self.maxdepth, duration, self.counters(), move, score)
+                if self.on_iteration:
+                    self.on_iteration(iteration)
+                yield move
+                if self.depth and self.maxdepth >= self.depth or self.maxdepth >= self.MAX_DEPTH:
+                    break
+                # Stop if the next iteration is not expected to finish in
+                #   time, counting the time the caller held the result
+                elapsed = time.time() - self.start
+                if (self.timelimit is not None and not self.pondering
+                        and elapsed + self.predict_iteration(duration, previous) > self.timelimit):
+                    break
+                previous = duration
+                self.maxdepth += 1
+
+        except SearchTimeout:
+            # Record the work of the unfinished iteration too
+            self.stats.add_iteration(self.maxdepth, time.time() - iteration_start, self.counters(),
+                    move, self.score, completed=False)
+
+    def ponder(self, board, history=()):
+        # Search on the opponent's time. board has the opponent to move; the
+        #   reply the transposition table expects is played and the position
+        #   after it searched in a background thread, without a time limit,
+        #   until the next iddfs call, stop_ponder or PONDER_NODES nodes. If the opponent played that reply the
+        #   search carries on under the usual limits, with the time spent
+        #   pondering counted against the time limit, otherwise it is
+        #   stopped. Either way its table entries are kept.
+        moves = board.get_moves()
+        if not moves:
+            return
+        entry = self.transposition.probe(board.key)
+        move = entry[3] if entry and entry[3] in moves else moves[0]
+        history = list(history) + [board.key]
+        board = board.copy()
+        board.make_move(move)
+        if not board.get_moves():
+            return
+        # threading is imported on first use, as it is not needed otherwise
+        import threading
+        if self.stop is None:
+            self.stop = threading.Event()
+        self.pondering = True
+        self.start = time.time()
+        self.ponder_key, self.ponder_move = board.key, None
+        self.ponder_thread = threading.Thread(target=self.ponder_search, args=(board, history), daemon=True)
+        self.ponder_thread.start()
+
+    def ponder_search(self, board, history):
+        self.ponder_move = self.iddfs(board, history)
+
+    def stop_pondering(self, board):
+        # Ends the background search. Returns its move if it was searching
+        #   board, after letting it finish under the time limit, else None.
+        thread, self.ponder_thread = self.ponder_thread, None
+        hit = board.key == self.ponder_key
+        if hit:
+            if self.verbose:
+                print('  Ponder hit')
+            self.deadline = self.start + self.timelimit if self.timelimit is not None else None
+            self.pondering = False
+            thread.join()
+            return self.ponder_move
+        self.ponder_thread = thread
+        self.stop_ponder()
+        return None
+
+    def stop_ponder(self):
+        # Stops and discards the background search of ponder, if any, for
+        #   when no search of the next position follows
+        thread, self.ponder_thread = self.ponder_thread, None
+        if thread:
+            self.stop.set()
+            thread.join()
+            self.stop.clear()
+        self.pondering = False
+
+    def parallel_search(self, board, moves):
+        # Lazy SMP: helper processes search the same position through the
+        #   shared transposition table until this process finishes its own
+        #   iterative deepening, then the deepest completed result is played.
+        #   A generator like iterate, its last move a helper's when one got
+        #   deeper than this process.
+        if not self.helpers:
+            self.start_helpers()
+        for i, (process, conn) in enumerate(self.helpers):
+            conn.send((board.get_state(), self.side, self.deadline, self.transposition.generation, i + 1,
+                    tuple(self.repetitions)))
+        try:
+            for move in self.iterate(board, moves):
+                yield move
+        finally:
+            # Also when the caller stops iterating, helpers must answer
+            #   before the next search
+            move = self.stop_helpers(moves)
+        if move is not None:
+            yield move
+
+    def stop_helpers(self, moves):
+        # Stops the helpers' search. Returns the move of the deepest
+        #   iteration a helper completed, if deeper than this process's,
+        #   leaving its depth and score in self.completed and self.score,
+        #   else None.
+        self.stop.set()
+        best = (self.completed, None, self.score)
+        self.helper_nodes = 0
+        for process, conn in self.helpers:
+            completed, helper_move, score, nodes = conn.recv()
+            self.helper_nodes += nodes
+            if completed > best[0] and helper_move in moves:
+                best = (completed, helper_move, score)
+        self.stop.clear()
+        self.completed, move, self.score = best
+        self.maxdepth = max(self.maxdepth, self.completed)
+        return move
+
+    def start_helpers(self):
+        # multiprocessing is only imported by parallel AIs, it is the slowest
+        #   import of the engine
+        import multiprocessing
+        context = multiprocessing.get_context()
+        self.stop = context.Event()
+        options = dict(search=self.search, quiescence_depth=self.quiescence_depth,
+                check_every=self.check_every, batch_eval=self.batch_eval,
+                move_ordering=self.move_ordering, tablebase=self.tablebase.directory if self.tablebase else None)
+        for i in range(self.workers - 1):
+            conn, child = context.Pipe()
+            process = context.Process(target=helper_process,
+                    args=(child, self.transposition, self.stop, options), daemon=True)
+            process.start()
+            self.helpers.append((process, conn))
+
+    def close(self):
+        # Stop the helper processes of a parallel AI
+        for process, conn in self.helpers:
+            conn.send(None)
+            process.join()
+        self.helpers = []
+
+    def predict_iteration(self, duration, previous):
+        # Time the next iteration is expected to take, from the growth in
+        #   time between the last two iterations
+        if previous:
+            growth = min(max(duration / previous, self.MIN_GROWTH), self.MAX_GROWTH)
+        else:
+            growth = self.MAX_GROWTH
+        return duration * growth
+
+    def minimax(self, board, moves, depth):
+        # minimax with alpha beta pruning, returns a list of scores
+        self.unexplored = 0
+        if len(moves) == 0:
+            # terminal state
+            return self.evaluate(board)
+        if not depth:
+            self.unexplored = 1
+            return self.evaluate(board)
+        values = []
+        v = float('-inf')
+        alpha, beta = float('-inf'), float('inf')
+        for move in moves:
+            undo = board.make_move(move)
+            min_value = self.min_value(board, depth - 1, alpha, beta)
+            board.unmake_move(undo)
+            values.append(min_value)
+            if min_value > v:
+                v, best = min_value, move
+            alpha = max(alpha, v)
+            if beta <= alpha:
+                break
+        self.transposition.store(board.key, depth if self.unexplored else TranspositionTable.COMPLETE,
+                TranspositionTable.EXACT, v, best)
+        return values
+
+    def aspiration(self, board, moves, depth, guess):
+        # Root PVS in a window around the previous iteration's score, widened
+        #   on the failing side until the best score falls inside it
+        if guess is None:
+            return self.pvs_root(board, moves, depth, float('-inf'), float('inf'))
+        delta = self.ASPIRATION_WINDOW
+        alpha, beta = guess - delta, guess + delta
+        while True:
+            scores = self.pvs_root(board, moves, depth, alpha, beta)
+            best = max(scores)
+            if best <= alpha:
+                alpha = best - delta
+            elif best >= beta:
+                beta = best + delta
+            else:
+                return scores
+            delta *= 4
+
+    def pvs_root(self, board, moves, depth, alpha, beta):
+        # Principal variation search at the root, returns a list of scores.
+        #   Only the best score is exact, the others are upper bounds.
+        self.unexplored = 0
+        alpha_orig = alpha
+        values = []
+        best_value, best = float('-inf'), moves[0]
+        for move in moves:
+            undo = board.make_move(move)
+            if not values:
+                value = -self.negamax(board, depth - 1, -beta, -alpha)
+            else:
+                value = -self.negamax(board, depth - 1, -alpha - self.NULL_WINDOW, -alpha)
+                if alpha < value < beta:
+                    value = -self.negamax(board, depth - 1, -beta, -alpha)
+            board.unmake_move(undo)
+            values.append(value)
+            if value > best_value:
+                best_value, best = value, move
+            alpha = max(alpha, value)
+            if beta <= alpha:
+                break
+        # A pass that failed against the aspiration window only bounds
+        #   the score, as in negamax
+        if best_value <= alpha_orig:
+            bound = TranspositionTable.UPPER
+        elif best_value >= beta:
+            bound = TranspositionTable.LOWER
+        else:
+            bound = TranspositionTable.EXACT
+        self.transposition.store(board.key, depth if self.unexplored else TranspositionTable.COMPLETE,
+                bound, best_value, best)
+        return values
+
+    def negamax(self, board, depth, alpha, beta):
+        # Negamax form of the alpha-beta search used by PVS. Scores are from
+        #   the side to move's point of view, as in the transposition table.
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_limits()
+        if board.key in self.repetitions:
+            return self.repetition()
+        if self.tablebase:
+            score = self.probe_tablebase(board)
+            if score is not None:
+                self.tbhits += 1
+                return score
+        if not depth:
+            return self.quiescence(board, alpha, beta, 0)
+
+        hash_move = 0
+        entry = self.transposition.probe(board.key)
+        if entry:
+            stored_depth, bound, score, hash_move = entry
+            if stored_depth >= depth and (bound == TranspositionTable.EXACT
+                    or (bound == TranspositionTable.LOWER and score >= beta)
+                    or (bound == TranspositionTable.UPPER and score <= alpha)):
+                if stored_depth < TranspositionTable.COMPLETE:
+                    self.unexplored = 1
+                return score
+
+        # Moves are generated lazily, hash move first, so a cutoff skips
+        #   generating the rest
+        moves = self.ordered_moves(board, depth, hash_move)
+        unexplored, self.unexplored = self.unexplored, 0
+        alpha_orig = alpha
+        if depth == 1 and self.batch_eval:
+            moves = list(moves)
+            if not moves:
+                self.unexplored = unexplored
+                return self.evaluate_relative(board)
+            value, best = self.frontier(board, moves, alpha, beta)
+        else:
+            self.repetitions.add(board.key)
+            value, best = float('-inf'), None
+            for i, move in enumerate(moves):
+                undo = board.make_move(move)
+                if i == 0:
+                    score = -self.negamax(board, depth - 1, -beta, -alpha)
+                else:
+                    # Null window search to prove the move is no better than
+                    #   alpha, searched again with the full window if it is
+                    score = -self.negamax(board, depth - 1, -alpha - self.NULL_WINDOW, -alpha)
+                    if alpha < score < beta:
+                        score = -self.negamax(board, depth - 1, -beta, -alpha)
+                board.unmake_move(undo)
+                if score > value:
+                    value, best = score, move
+                alpha = max(alpha, value)
+                if beta <= alpha:
+                    if __debug__:
+                        self.cutoffs += 1
+                        self.first_cutoffs += i == 0
+                    if self.move_ordering:
+                        self.record_cutoff(board, move, depth)
+                    break
+            self.repetitions.discard(board.key)
+            if best is None:
+                self.unexplored = unexplored
+                return self.evaluate_relative(board)
+
+        if value <= alpha_orig:
+            bound = TranspositionTable.UPPER
+        elif value >= beta:
+            bound = TranspositionTable.LOWER
+        else:
+            bound = TranspositionTable.EXACT
+        self.transposition.store(board.key, depth if self.unexplored else TranspositionTable.COMPLETE,
+                bound, value, best)
+        self.unexplored |= unexplored
+        return value
+
+    def ordered_moves(self, board, depth, hash_move):
+        # Moves of an interior node, generated lazily: the hash move, then
+        #   the killer moves of its ply, then the rest, simple moves in
+        #   history order
+        if not self.move_ordering:
+            return board.generate_moves((hash_move,))
+        killers = self.killers[self.maxdepth - depth]
+        return board.generate_moves((hash_move, killers[0], killers[1]), self.history)
+
+    def record_cutoff(self, board, move, depth):
+        # A simple move caused a beta cutoff at board, make it a killer of
+        #   the ply and count it in the history. Jumps are compulsory, so
+        #   they are not worth remembering.
+        if board.side == board.BLACK:
+            own, opponent = board.black, board.white
+        else:
+            own, opponent = board.white, board.black
+        if move & opponent:
+            return
+        killers = self.killers[self.maxdepth - depth]
+        if killers[0] != move:
+            killers[1], killers[0] = killers[0], move
+        piece = move & own
+        self.history[(piece.bit_length() - 1) << 5 | ((move ^ piece).bit_length() - 1)] += depth * depth
+
+    def frontier(self, board, moves, alpha, beta):
+        # Expand a node one ply above the depth limit. Quiet children are
+        #   scored together by the batch evaluator, children with a forced
+        #   jump still go through the quiescence search, repeated positions
+        #   are draws and positions in the tablebases get their exact score,
+        #   as at any other node. Returns the value and best move from the
+        #   side to move's point of view.
+        value, best = float('-inf'), moves[0]
+        states, quiet = [], []
+        self.repetitions.add(board.key)
+        for move in moves:
+            undo = board.make_move(move)
+            self.nodes += 1
+            score = None
+            if board.key in self.repetitions:
+                score = -self.repetition()
+            elif self.tablebase:
+                score = self.probe_tablebase(board)
+                if score is not None:
+                    self.tbhits += 1
+                    score = -score
+            if score is None and board.get_jumpers():
+                score = -self.quiescence(board, -beta, -alpha, 0)
+            if score is not None:
+                if score > value:
+                    value, best = score, move
+                alpha = max(alpha, value)
+            else:
+                if board.has_moves():
+                    self.unexplored = 1
+                states.append(board.get_state())
+                quiet.append(move)
+            board.unmake_move(undo)
+            if beta <= alpha:
+                self.repetitions.discard(board.key)
+                return value, best
+        self.repetitions.discard(board.key)
+
+        if states:
+            if __debug__:
+                self.evaluations += len(states)
+            for move, score in zip(quiet, self.evaluate_batch(states, board.side).tolist()):
+                if score > value:
+                    value, best = score, move
+        return value, best
+
+    def quiescence(self, board, alpha, beta, ply):
+        # Follow forced jumps past the depth limit until the position is
+        #   quiet, so exchanges are not cut off halfway. Jumps are compulsory,
+        #   so there is no standing pat. Scores are from the side to move's
+        #   point of view.
+        jumps = board.get_jumps() if ply < self.quiescence_depth else None
+        if not jumps:
+            if jumps is None and board.get_jumpers():
+                self.qcapped += 1
+                self.unexplored = 1
+            elif board.has_moves():
+                self.unexplored = 1
+            return self.evaluate_relative(board)
+
+        self.qnodes += 1
+        if ply >= self.qdepth:
+            self.qdepth = ply + 1
+        value = float('-inf')
+        for move in jumps:
+            undo = board.make_move(move)
+            score = -self.quiescence(board, -beta, -alpha, ply + 1)
+            board.unmake_move(undo)
+            value = max(value, score)
+            alpha = max(alpha, value)
+            if beta <= alpha:
+                break
+        return value
+
+    def max_value(self, board, depth, alpha, beta):
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_limits()
+        if board.key in self.repetitions:
+            return self.repetition()
+        if self.tablebase:
+            score = self.probe_tablebase(board)
+            if score is not None:
+                self.tbhits += 1
+                return score
+        if not depth:
+            # The side to move is the searching side
+            return self.quiescence(board, alpha, beta, 0)
+
+        # Scores in the table are from the side to move's point of view,
+        #   which at max nodes is the searching side
+        hash_move = 0
+        entry = self.transposition.probe(board.key)
+        if entry:
+            stored_depth, bound, score, hash_move = entry
+            if stored_depth >= depth and (bound == TranspositionTable.EXACT
+                    or (bound == TranspositionTable.LOWER and score >= beta)
+                    or (bound == TranspositionTable.UPPER and score <= alpha)):
+                if stored_depth < TranspositionTable.COMPLETE:
+                    self.unexplored = 1
+                return score
+
+        # Track whether this subtree reached the depth limit anywhere
+        unexplored, self.unexplored = self.unexplored, 0
+        alpha_orig = alpha
+        value, best = float('-inf'), None
+        self.repetitions.add(board.key)
+        for i, move in enumerate(self.ordered_moves(board, depth, hash_move)):
+            undo = board.make_move(move)
+            min_value = self.min_value(board, depth - 1, alpha, beta)
+            board.unmake_move(undo)
+            if min_value > value:
+                value, best = min_value, move
+            alpha = max(alpha, value)
+            if beta <= alpha:
+                if __debug__:
+                    self.cutoffs += 1
+                    self.first_cutoffs += i == 0
+                if self.move_ordering:
+                    self.record_cutoff(board, move, depth)
+                break
+        self.repetitions.discard(board.key)
+        if best is None:
+            self.unexplored = unexplored
+            return self.evaluate(board)
+
+        if value <= alpha_orig:
+            bound = TranspositionTable.UPPER
+        elif value >= beta:
+            bound = TranspositionTable.LOWER
+        else:
+            bound = TranspositionTable.EXACT
+        self.transposition.store(board.key, depth if self.unexplored else TranspositionTable.COMPLETE,
+                bound, value, best)
+        self.unexplored |= unexplored
+        return value
+
+    def min_value(self, board, depth, alpha, beta):
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_limits()
+        if board.key in self.repetitions:
+            return self.repetition()
+        if self.tablebase:
+            score = self.probe_tablebase(board)
+            if score is not None:
+                self.tbhits += 1
+                return -score
+        if not depth:
+            return -self.quiescence(board, -beta, -alpha, 0)
+
+        # At min nodes the side to move is the opponent, so table scores
+        #   and bounds are flipped
+        hash_move = 0
+        entry = self.transposition.probe(board.key)
+        if entry:
+            stored_depth, bound, score, hash_move = entry
+            if stored_depth >= depth and (bound == TranspositionTable.EXACT
+                    or (bound == TranspositionTable.LOWER and -score <= alpha)
+                    or (bound == TranspositionTable.UPPER and -score >= beta)):
+                if stored_depth < TranspositionTable.COMPLETE:
+                    self.unexplored = 1
+                return -score
+
+        unexplored, self.unexplored = self.unexplored, 0
+        beta_orig = beta
+        value, best = float('inf'), None
+        self.repetitions.add(board.key)
+        for i, move in enumerate(self.ordered_moves(board, depth, hash_move)):
+            undo = board.make_move(move)
+            max_value = self.max_value(board, depth - 1, alpha, beta)
+            board.unmake_move(undo)
+            if max_value < value:
+                value, best = max_value, move
+            beta = min(beta, value)
+            if beta <= alpha:
+                if __debug__:
+                    self.cutoffs += 1
+                    self.first_cutoffs += i == 0
+                if self.move_ordering:
+                    self.record_cutoff(board, move, depth)
+                break
+        self.repetitions.discard(board.key)
+        if best is None:
+            self.unexplored = unexplored
+            return self.evaluate(board)
+
+        if value <= alpha:
+            bound = TranspositionTable.LOWER
+        elif value >= beta_orig:
+            bound = TranspositionTable.UPPER
+        else:
+            bound = TranspositionTable.EXACT
+        self.transposition.store(board.key, depth if self.unexplored else TranspositionTable.COMPLETE,
+                bound, -value, best)
+        self.unexplored |= unexplored
+        return value
+
+    def repetition(self):
+        # Score of a position already on the search path or in the game
+        #   history: a draw, with the subtree below it cut. The score depends
+        #   on the path that led to it, so the node does not count as
+        #   complete.
+        self.unexplored = 1
+        return 0
+
+    def probe_tablebase(self, board):
+        # Exact score from the side to move's point of view if the position
+        #   is in the tablebases, otherwise None. Tablebase scores stand for
+        #   the whole game below the node, so they leave it complete.
+        terms = board.terms
+        if (terms & TERM_MASK) + ((terms >> WHITE_PIECES) & TERM_MASK) > self.tablebase.pieces:
+            return None
+        result = self.tablebase.probe(board)
+        if result is None:
+            return None
+        value, plies = result
+        if value == WIN:
+            return self.TABLEBASE_WIN - plies
+        if value == LOSS:
+            return plies - self.TABLEBASE_WIN
+        return 0
+
+    def evaluate(self, board):
+        if __debug__:
+            self.evaluations += 1
+        if self.tablebase:
+            score = self.probe_tablebase(board)
+            if score is not None:
+                return score if board.side == self.side else -score
+
+        score = 0
+
+        # Piece counts kept incrementally by make_move, see checkers.TERMS
+        terms = board.terms
+        nblack = terms & TERM_MASK
+        nwhite = (terms >> WHITE_PIECES) & TERM_MASK
+        nblack_kings = (terms >> BLACK_KINGS) & TERM_MASK
+        nwhite_kings = (terms >> WHITE_KINGS) & TERM_MASK
+
+        # Piece counts to determine game phase
+        npieces = nblack + nwhite
+        nkings = nblack_kings + nwhite_kings
+        nmen = npieces - nkings
+        
+        # Early-mid game is classified as when there are pawns or more than 5 pieces
+        if nmen or npieces > 5:
+            # Material advantage
+            material_black = nblack + nblack_kings * .5
+            material_white = nwhite + nwhite_kings * .5
+            
+            # Favor trades when ahead in material. Max material on the board is 36
+            exchange = (37 - material_black - material_white)
+            score += (material_black - material_white) * exchange * 5
+            
+            # Advancement
+            score += (((terms >> BLACK_ADVANCED) & TERM_MASK) - ((terms >> WHITE_ADVANCED) & TERM_MASK)) * 20
+
+            # Central kings
+            score += (((terms >> BLACK_CENTER_KINGS) & TERM_MASK) - ((terms >> WHITE_CENTER_KINGS) & TERM_MASK)) * 20
+            
+            # King defense
+            score += (((terms >> BLACK_BACK_RANK) & TERM_MASK) - ((terms >> WHITE_BACK_RANK) & TERM_MASK)) * 10
+
+            # Bridges and dog-holes in each side's home corner
+            black, white, kings = board.black, board.white, board.kings
+            score += HOME_PATTERNS[0][(black & 0xf) | ((white & ~kings) & 0xf0)]
+            score -= HOME_PATTERNS[1][(white >> 28) | ((black & ~kings) >> 20 & 0xf0)]
+            
+        # Endgame, 5 kings or fewer
+        else:
+            king_advantage = nblack - nwhite
+            exchange = 6 - nblack - nwhite
+            score += king_advantage * exchange * 50
+            
+            #  Favor attacking with advantage in endgame
+            score -= king_advantage * self.total_distance(board.black, board.white)
+            
+            score += (((terms >> BLACK_CORNERS) & TERM_MASK) - ((terms >> WHITE_CORNERS) & TERM_MASK)) * 50
+        
+        # Phase agnostic heuristics
+        # Turn advantage
+        if board.side == board.BLACK:
+            score += 3
+        else:
+            score -= 3
+        
+        # Heuristic is symmetric
+        return score if self.side == board.BLACK else -1 * score
+
+    def evaluate_batch(self, states, perspective=None):
+        # evaluate() over an array of (black, white, kings, side) states,
+        #   vectorized with numpy, which is only needed for this
+        from . import batch
+        return batch.evaluate_batch(states, self.side if perspective is None else perspective)
+
+    def evaluate_relative(self, board):
+        # Evaluation from the side to move's point of view
+        score = self.evaluate(board)
+        return score if board.side == self.side else -score
+
+    def total_distance(self, black, white):
+        # Sum of the manhattan distances between pieces
+        total = 0
+        while black:
+            bit = black & -black
+            black ^= bit
+            distances = SQUARE_DISTANCE[bit.bit_length() - 1]
+            rest = white
+            while rest:
+                bit = rest & -rest
+                rest ^= bit
+                total += distances[bit.bit_length() - 1]
+        return total
+
+def helper_process(conn, table, stop, options):
+    # Lazy SMP helper. Searches each position it is sent until stopped,
+    #   starting at alternating depths and with its own root move order so
+    #   helpers fill different parts of the shared table.
+    ai = AI(None, verbose=False, **options)
+    ai.transposition = table
+    ai.stop = stop
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        state, side, deadline, generation, index, repetitions = job
+        board = Bitboard(state)
+        ai.repetitions = set(repetitions)
+        ai.transposition.generation = generation
+        ai.start, ai.deadline, ai.next_check = time.time(), deadline, ai.check_every
+        ai.reset_stats()
+        ai.stats = SearchStats()
+        ai.side = side
+        moves = board.get_moves()
+        random.Random(index).shuffle(moves)
+        move = ai.deepen(board, moves, 1 + index % 2)
+        conn.send((ai.completed, move, ai.score, ai.nodes))
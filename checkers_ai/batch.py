@@ -0,0 +1,229 @@
+import numpy as np
+from .checkers import Bitboard, NEIGHBOR, LANDING, LANDING_SQUARE, SOUTH
+
+# Vectorized versions of engine routines over many positions at once.
+#   Positions are given as an (n, 4) array of (black, white, kings, side)
+#   rows, as returned by Bitboard.get_state().
+
+def as_states(states):
+    states = np.asarray(states, dtype=np.int64).reshape(-1, 4)
+    black = states[:, 0].astype(np.uint32)
+    white = states[:, 1].astype(np.uint32)
+    kings = states[:, 2].astype(np.uint32)
+    side = states[:, 3].astype(np.int8)
+    return black, white, kings, side
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(bitboards):
+        return np.bitwise_count(bitboards).astype(np.int64)
+else:
+    def popcount(bitboards):
+        # SWAR popcount of uint32 arrays
+        x = bitboards.astype(np.uint32)
+        x = x - ((x >> np.uint32(1)) & np.uint32(0x55555555))
+        x = (x & np.uint32(0x33333333)) + ((x >> np.uint32(2)) & np.uint32(0x33333333))
+        x = (x + (x >> np.uint32(4))) & np.uint32(0x0f0f0f0f)
+        return ((x * np.uint32(0x01010101)) >> np.uint32(24)).astype(np.int64)
+
+def unpack(bitboards):
+    # (n, 32) array of 0/1 per square
+    shifts = np.arange(32, dtype=np.uint32)
+    return ((bitboards[:, None] >> shifts) & np.uint32(1)).astype(np.int64)
+
+# numpy copies of the AI's evaluation tables, made on first use
+DISTANCE = HOME_PATTERNS = None
+
+def evaluate_batch(states, perspective=None):
+    # AI.evaluate over an array of positions. Scores are from perspective
+    #   (Bitboard.BLACK or Bitboard.WHITE), as with AI.side, or from each
+    #   position's side to move if perspective is None.
+    global DISTANCE, HOME_PATTERNS
+    if DISTANCE is None:
+        from . import ai
+        DISTANCE = np.array(ai.SQUARE_DISTANCE, dtype=np.int64)
+        HOME_PATTERNS = np.array(ai.HOME_PATTERNS, dtype=np.int64)
+    black, white, kings, side = as_states(states)
+    nblack, nwhite = popcount(black), popcount(white)
+    npieces = nblack + nwhite
+    nmen = npieces - popcount(kings)
+    midgame = (nmen > 0) | (npieces > 5)
+
+    score = np.zeros(len(black))
+
+    # Early-mid game terms, see AI.evaluate
+    material_black = nblack + popcount(black & kings) * .5
+    material_white = nwhite + popcount(white & kings) * .5
+    exchange = 37 - material_black - material_white
+    mid = (material_black - material_white) * exchange * 5
+    mid += (popcount(black & np.uint32(0xfffff000)) - popcount(white & np.uint32(0x000fffff))) * 20
+    center = np.uint32(0x00666600)
+    mid += (popcount(black & kings & center) - popcount(white & kings & center)) * 20
+    mid += (popcount(black & np.uint32(0x0000000f)) - popcount(white & np.uint32(0xf0000000))) * 10
+    men = ~kings
+    mid += HOME_PATTERNS[0][(black & np.uint32(0xf)) | (white & men & np.uint32(0xf0))]
+    mid -= HOME_PATTERNS[1][(white >> np.uint32(28)) | ((black & men) >> np.uint32(20) & np.uint32(0xf0))]
+    score[midgame] = mid[midgame]
+
+    # Endgame terms, only computed for endgame positions
+    end = ~midgame
+    if end.any():
+        b, w = black[end], white[end]
+        king_advantage = nblack[end] - nwhite[end]
+        value = king_advantage * (6 - nblack[end] - nwhite[end]) * 50.
+        distance = np.einsum('ni,ij,nj->n', unpack(b), DISTANCE, unpack(w))
+        value -= king_advantage * distance
+        corners = np.uint32(0x88000011)
+        value += (popcount(b & corners) - popcount(w & corners)) * 50
+        score[end] = value
+
+    # Turn advantage
+    score += np.where(side == Bitboard.BLACK, 3, -3)
+
+    if perspective is None:
+        return np.where(side == Bitboard.BLACK, score, -score)
+    return score if perspective == Bitboard.BLACK else -score
+
+# Move generation. Each of the six simple move directions is a whole board
+#   shift, in get_moves order for black: south by 4, 3 and 5, then north by
+#   4, 3 and 5. White takes the north shifts first.
+SHIFTS = (4, 3, 5, -4, -3, -5)
+DIRECTION_ORDER = np.array([[0, 1, 2, 3, 4, 5], [3, 4, 5, 0, 1, 2]])
+
+def build_move_values():
+    # MOVE_VALUES[side][group][square]: the move of a piece on square in the
+    #   side's group-th direction
+    values = np.zeros((2, 6, 32), dtype=np.uint32)
+    for side in (Bitboard.BLACK, Bitboard.WHITE):
+        for group, direction in enumerate(DIRECTION_ORDER[side]):
+            shift = SHIFTS[direction]
+            for square in range(32):
+                target = square + shift
+                if 0 <= target < 32:
+                    values[side, group, square] = (1 << square) | (1 << target)
+    return values
+
+MOVE_VALUES = build_move_values()
+NEIGHBOR_TABLE = np.array(NEIGHBOR, dtype=np.uint32)
+LANDING_TABLE = np.array(LANDING, dtype=np.uint32)
+LANDING_SQUARE_TABLE = np.array(LANDING_SQUARE, dtype=np.int64)
+
+def half_tables():
+    # Set bits of every 16 bit value, lowest first, and how many there are
+    bits = (np.arange(1 << 16)[:, None] >> np.arange(16)) & 1
+    return np.argsort(-bits, axis=1, kind='stable'), bits.sum(axis=1)
+
+HALF_BITS = HALF_COUNTS = None
+
+def set_bits(bitboards):
+    # (index, square) of every set bit of a uint32 array, by index and then
+    #   square, read 16 bits at a time from lookup tables
+    global HALF_BITS, HALF_COUNTS
+    if HALF_BITS is None:
+        HALF_BITS, HALF_COUNTS = half_tables()
+    index = np.flatnonzero(bitboards)
+    nonzero = bitboards[index]
+    halves = np.stack((nonzero & np.uint32(0xffff), nonzero >> np.uint32(16)), axis=1).ravel()
+    counts = HALF_COUNTS[halves]
+    cell = np.repeat(np.arange(len(halves)), counts)
+    rank = np.arange(len(cell)) - (np.cumsum(counts) - counts)[cell]
+    return index[cell >> 1], HALF_BITS[halves[cell], rank] + 16 * (cell & 1)
+
+def move_sources(states):
+    # (movable, jumpers): for every position an (n, 6) array of the pieces
+    #   able to make a simple move in each direction, in the side to move's
+    #   get_moves order, and the pieces able to jump, as in
+    #   Bitboard.get_jumpers
+    black, white, kings, side = as_states(states)
+    empty = ~(black | white)
+    is_black = side == Bitboard.BLACK
+    south = np.where(is_black, black, white & kings)
+    north = np.where(is_black, black & kings, white)
+    opponent = np.where(is_black, white, black)
+    u = np.uint32
+
+    movable = np.stack([
+        (empty >> u(4)) & south,
+        (empty >> u(3)) & south & u(Bitboard.MASK_SW),
+        (empty >> u(5)) & south & u(Bitboard.MASK_SE),
+        (empty << u(4)) & north,
+        (empty << u(3)) & north & u(Bitboard.MASK_NE),
+        (empty << u(5)) & north & u(Bitboard.MASK_NW)], axis=1)
+    movable = np.take_along_axis(movable, DIRECTION_ORDER[side.astype(np.int64)], axis=1)
+
+    takeable = (empty >> u(4)) & opponent
+    jumpers = south & (((takeable >> u(3)) & u(Bitboard.MASK_SW)) | ((takeable >> u(5)) & u(Bitboard.MASK_SE))
+            | ((((empty >> u(3)) & u(Bitboard.MASK_SW)) | ((empty >> u(5)) & u(Bitboard.MASK_SE)))
+                & opponent) >> u(4))
+    takeable = (empty << u(4)) & opponent
+    jumpers |= north & (((takeable << u(3)) & u(Bitboard.MASK_NE)) | ((takeable << u(5)) & u(Bitboard.MASK_NW))
+            | ((((empty << u(3)) & u(Bitboard.MASK_NE)) | ((empty << u(5)) & u(Bitboard.MASK_NW)))
+                & opponent) << u(4))
+    return movable, jumpers
+
+def expand_jumps(position, jumpers, black, white, kings, side):
+    # Every complete jump sequence of the jumping pieces of the given
+    #   positions, as (position, move) arrays, following jump_chains one
+    #   step at a time for all partial sequences at once
+    p, square = set_bits(jumpers)
+    p = position[p]
+    start = np.uint32(1) << square.astype(np.uint32)
+    captured = np.zeros(len(p), dtype=np.uint32)
+    king = (kings[p] & start) != 0
+    forward = side[p] == Bitboard.BLACK
+    opponent = np.where(forward, white[p], black[p])
+    empty = ~(black[p] | white[p])
+    partial = (p, start, square, captured, king, forward, opponent, empty)
+
+    found = []
+    while len(partial[0]):
+        p, start, square, captured, king, forward, opponent, empty = partial
+        extended = np.zeros(len(p), dtype=bool)
+        steps = []
+        for d in range(4):
+            taken = NEIGHBOR_TABLE[d, square]
+            ok = ((king | (forward if d in SOUTH else ~forward)) & ((taken & opponent) != 0)
+                    & ((taken & captured) == 0) & ((LANDING_TABLE[d, square] & empty) != 0))
+            extended |= ok
+            step = [a[ok] for a in partial]
+            step[2] = LANDING_SQUARE_TABLE[d, step[2]]
+            step[3] = step[3] | taken[ok]
+            steps.append(step)
+        done = ~extended & (captured != 0)
+        found.append((p[done], king[done],
+                start[done] | captured[done] | (np.uint32(1) << square[done].astype(np.uint32))))
+        partial = [np.concatenate(parts) for parts in zip(*steps)]
+
+    p, king, moves = (np.concatenate(parts) for parts in zip(*found))
+    # A king can reach the same move along different paths, these are
+    #   counted once as in get_jumps
+    if king.any():
+        keys = np.unique((p[king].astype(np.int64) << 32) | moves[king].astype(np.int64))
+        p = np.concatenate((p[~king], keys >> 32))
+        moves = np.concatenate((moves[~king], (keys & 0xffffffff).astype(np.uint32)))
+    return p, moves
+
+def generate_moves(states):
+    # Bitboard.get_moves over an array of positions. Returns (moves,
+    #   offsets): the moves of position i are moves[offsets[i]:offsets[i + 1]].
+    #   Simple moves come in get_moves order, jumps in no particular order,
+    #   as with get_moves.
+    black, white, kings, side = as_states(states)
+    n = len(black)
+    movable, jumpers = move_sources(states)
+    movable[jumpers != 0] = 0
+
+    cell, square = set_bits(movable.ravel())
+    p, group = cell // 6, cell % 6
+    moves = MOVE_VALUES[side[p].astype(np.int64), group, square]
+
+    jumping = np.nonzero(jumpers)[0]
+    if len(jumping):
+        jump_position, jumps = expand_jumps(jumping, jumpers[jumping], black, white, kings, side)
+        p = np.concatenate((p, jump_position))
+        moves = np.concatenate((moves, jumps))
+        order = np.argsort(p, kind='stable')
+        p, moves = p[order], moves[order]
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(p, minlength=n), out=offsets[1:])
+    return moves, offsets
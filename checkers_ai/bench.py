@@ -0,0 +1,182 @@
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+from .checkers import Bitboard
+from .ai import AI
+
+# Benchmark positions: the start position and positions reached by seeded
+#   random play, all with several legal moves and no forced jump.
+POSITIONS = [
+    None,
+    (0x02000eba, 0x39501040, 0x02000000, 1),
+    (0x00000988, 0x9a310002, 0x00000002, 0),
+    (0x0004081f, 0xfa020000, 0x00000000, 1),
+    (0x00080101, 0x6d200014, 0x00000004, 1),
+    (0x00002abd, 0xb1f10000, 0x00000000, 0),
+    (0x00004c9f, 0xf9a80000, 0x00000000, 0),
+    (0x00004ddf, 0xeef20000, 0x00000000, 0),
+    (0x200015fc, 0x5a690800, 0x20000000, 1),
+]
+
+def search(ai, state):
+    # Run one search, returns (move, nodes, seconds)
+    start = time.time()
+    move = ai.iddfs(Bitboard(state))
+    return move, ai.nodes, time.time() - start
+
+def bench_search(depth, searches=AI.SEARCHES):
+    # Nodes searched by each search to a fixed depth, each position with a
+    #   fresh transposition table
+    print('Fixed depth {} search, nodes per position'.format(depth))
+    print('{:>4} '.format('pos') + ''.join('{:>12} {:>8}'.format(s, 'time') for s in searches))
+    totals = dict((s, 0) for s in searches)
+    for i, state in enumerate(POSITIONS):
+        row = '{:>4} '.format(i)
+        for s in searches:
+            move, nodes, elapsed = search(AI(None, search=s, depth=depth, verbose=False), state)
+            totals[s] += nodes
+            row += '{:>12} {:>7.2f}s'.format(nodes, elapsed)
+        print(row)
+    print('{:>4} '.format('all') + ''.join('{:>12} {:>8}'.format(totals[s], '') for s in searches))
+    base = totals[searches[-1]]
+    for s in searches[:-1]:
+        print('{}: {:.1%} of {} nodes'.format(s, totals[s] / base if base else 0, searches[-1]))
+
+def bench_ordering(depth):
+    # Nodes, time and first move cutoff rate to a fixed depth with and
+    #   without killer and history move ordering
+    print('Fixed depth {} search, move ordering'.format(depth))
+    for ordering in (False, True):
+        nodes = cutoffs = first_cutoffs = total = 0
+        for state in POSITIONS:
+            ai = AI(None, depth=depth, move_ordering=ordering, verbose=False)
+            move, searched, elapsed = search(ai, state)
+            nodes += searched
+            total += elapsed
+            cutoffs += ai.cutoffs
+            first_cutoffs += ai.first_cutoffs
+        print('{:<20} {:>10} nodes {:>7.2f}s  first move cutoffs {:.1%}'.format(
+            'killers and history' if ordering else 'hash move only', nodes, total,
+            first_cutoffs / cutoffs if cutoffs else 0))
+
+def bench_smp(depth, worker_counts):
+    # Time to reach a fixed depth with each number of workers, with the
+    #   transposition table cleared between positions
+    print('Fixed depth {} search, time per worker count'.format(depth))
+    base = None
+    for workers in worker_counts:
+        ai = AI(None, depth=depth, workers=workers, verbose=False)
+        total = nodes = 0
+        for state in POSITIONS:
+            ai.transposition.clear()
+            move, main_nodes, elapsed = search(ai, state)
+            total += elapsed
+            nodes += main_nodes + ai.helper_nodes
+        ai.close()
+        base = base or total
+        print('{:>3} workers: {:>7.2f}s {:>10} nodes, speedup {:.2f}'.format(workers, total, nodes, base / total))
+
+def playout_states(count, seed=0):
+    # Positions reached by random play from the start position
+    rng = random.Random(seed)
+    states = []
+    while len(states) < count:
+        board = Bitboard()
+        for ply in range(rng.randrange(1, 80)):
+            moves = board.get_moves()
+            if not moves:
+                break
+            board.make_move(rng.choice(moves))
+        states.append(board.get_state())
+    return states
+
+def bench_movegen(count):
+    # Positions per second expanded by Bitboard.get_moves and by the numpy
+    #   batch generator, checking both give the same moves
+    import numpy as np
+    from . import batch
+    states = playout_states(count)
+    boards = [Bitboard(state) for state in states]
+    array = np.array(states, dtype=np.int64)
+    batch.generate_moves(array[:10])
+
+    # Best of 5 runs each
+    single = vectorized = float('inf')
+    for run in range(5):
+        start = time.perf_counter()
+        expected = [board.get_moves() for board in boards]
+        single = min(single, time.perf_counter() - start)
+        start = time.perf_counter()
+        moves, offsets = batch.generate_moves(array)
+        vectorized = min(vectorized, time.perf_counter() - start)
+
+    for i, board in enumerate(boards):
+        assert sorted(moves[offsets[i]:offsets[i + 1]].tolist()) == sorted(expected[i]), board.get_state()
+    print('{} positions, {} moves'.format(count, len(moves)))
+    print('get_moves:      {:>10.0f} positions/s'.format(count / single))
+    print('generate_moves: {:>10.0f} positions/s, {:.1f}x'.format(count / vectorized, single / vectorized))
+
+# Cold import of the engine in a new interpreter, in seconds, so worker
+#   processes start cheaply. It was about 0.1s when multiprocessing,
+#   threading, json and termcolor were imported up front; the time now
+#   depends on the machine and its load, from under 0.01s to a few
+#   hundredths of a second.
+IMPORT_BUDGET = 0.05
+# Modules the package only imports when they are used
+LAZY_MODULES = ('termcolor', 'numpy', 'multiprocessing', 'threading', 'json', 'argparse')
+
+def import_time(runs=5):
+    # Best time of runs imports of the public API, each in a new
+    #   interpreter, and the lazily imported modules that were loaded anyway
+    code = ('import sys, time\n'
+            'start = time.perf_counter()\n'
+            'from checkers_ai import Bitboard, GameHistory, AI, SearchStats\n'
+            'print(time.perf_counter() - start)\n'
+            'print(" ".join(m for m in {!r} if m in sys.modules))').format(LAZY_MODULES)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best, loaded = float('inf'), []
+    for run in range(runs):
+        output = subprocess.run([sys.executable, '-c', code], cwd=root, check=True,
+                stdout=subprocess.PIPE, universal_newlines=True).stdout.split('\n')
+        best = min(best, float(output[0]))
+        loaded = output[1].split()
+    return best, loaded
+
+def bench_import(runs):
+    seconds, loaded = import_time(runs)
+    print('checkers_ai import: {:.4f}s, budget {:.4f}s'.format(seconds, IMPORT_BUDGET))
+    if loaded:
+        print('loaded on import: ' + ' '.join(loaded))
+    return seconds <= IMPORT_BUDGET and not loaded
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Engine benchmarks.')
+    sub = parser.add_subparsers(dest='bench')
+    p = sub.add_parser('search', help='node counts of each search at a fixed depth')
+    p.add_argument('--depth', type=int, default=8)
+    p = sub.add_parser('ordering', help='nodes and first move cutoff rate with and without move ordering')
+    p.add_argument('--depth', type=int, default=9)
+    p = sub.add_parser('smp', help='speedup of the parallel search against the number of workers')
+    p.add_argument('--depth', type=int, default=9)
+    p.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    p = sub.add_parser('movegen', help='positions per second of single and batch move generation')
+    p.add_argument('--positions', type=int, default=100000)
+    p = sub.add_parser('import', help='cold import time of the package against its budget')
+    p.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.bench == 'search':
+        bench_search(args.depth)
+    elif args.bench == 'ordering':
+        bench_ordering(args.depth)
+    elif args.bench == 'smp':
+        bench_smp(args.depth, args.workers)
+    elif args.bench == 'movegen':
+        bench_movegen(args.positions)
+    elif args.bench == 'import':
+        sys.exit(0 if bench_import(args.runs) else 1)
+    else:
+        parser.print_help()
@@ -0,0 +1,157 @@
+import os
+import random
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from .checkers import Bitboard
+from .ai import AI
+
+# Opening book: searched scores of the moves of positions near the start of
+#   the game, keyed by Zobrist hash.
+#
+# The file holds the entries sorted by key as parallel columns, a count
+#   followed by the keys, moves, scores (from the side to move's point of
+#   view) and the ply each position was first reached at.
+
+class OpeningBook:
+    # key, move, score, ply
+    TYPECODES = ('Q', 'I', 'f', 'B')
+
+    def __init__(self, path, plies=None, margin=0, seed=None):
+        self.path = path
+        # Only positions reached within this many plies of the start are
+        #   played from the book, all of them if None
+        self.plies = plies
+        # Moves scored within margin of the best are picked between at random
+        self.margin = margin
+        self.random = random.Random(seed)
+        self.keys = None
+        self.hits = 0
+
+    def load(self):
+        # Read on the first probe, so an AI with a book starts as fast as one
+        #   without
+        columns = [array(code) for code in self.TYPECODES]
+        with open(self.path, 'rb') as f:
+            count = array('Q')
+            count.fromfile(f, 1)
+            for column in columns:
+                column.fromfile(f, count[0])
+        self.keys, self.moves, self.scores, self.ply = columns
+
+    def entries(self, board):
+        # [(move, score)] stored for a position, empty if it is not in the
+        #   book or is deeper than the book depth
+        if self.keys is None:
+            self.load()
+        lo = bisect_left(self.keys, board.key)
+        hi = bisect_right(self.keys, board.key, lo)
+        if lo == hi or (self.plies is not None and self.ply[lo] >= self.plies):
+            return []
+        return [(self.moves[i], self.scores[i]) for i in range(lo, hi)]
+
+    def probe(self, board, moves):
+        # A book move among the legal moves, or None. Of the moves within
+        #   margin of the best, those build followed, leading to positions
+        #   in the book, are picked first, so ties the book did not expand
+        #   do not end it early.
+        entries = [(move, score) for move, score in self.entries(board) if move in moves]
+        if not entries:
+            return None
+        best = max(score for move, score in entries)
+        candidates = [move for move, score in entries if score >= best - self.margin]
+        followed = []
+        for move in candidates:
+            undo = board.make_move(move)
+            if self.entries(board):
+                followed.append(move)
+            board.unmake_move(undo)
+        self.hits += 1
+        return self.random.choice(followed or candidates)
+
+def write(path, entries):
+    # entries: {key: (ply, [(move, score)])}
+    columns = [array(code) for code in OpeningBook.TYPECODES]
+    keys, moves, scores, plies = columns
+    for key in sorted(entries):
+        ply, scored = entries[key]
+        for move, score in scored:
+            keys.append(key)
+            moves.append(move)
+            scores.append(score)
+            plies.append(min(ply, 255))
+    with open(path, 'wb') as f:
+        array('Q', [len(keys)]).tofile(f)
+        for column in columns:
+            column.tofile(f)
+
+def position_score(ai, board, depth):
+    # Searched score of a position from the side to move's point of view.
+    #   Forced moves are played out, as the search returns them unscored.
+    moves = board.get_moves()
+    if not moves:
+        ai.side = board.side
+        return ai.evaluate(board)
+    if len(moves) == 1:
+        undo = board.make_move(moves[0])
+        score = -position_score(ai, board, max(depth - 1, 1))
+        board.unmake_move(undo)
+        return score
+    ai.depth = depth
+    ai.iddfs(board)
+    return ai.score
+
+def score_moves(state, depth, table_mb=16):
+    # [(move, score)] for every move of a position, each searched to depth
+    ai = AI(None, table_mb=table_mb, verbose=False)
+    board = Bitboard(state)
+    scored = []
+    for move in board.get_moves():
+        undo = board.make_move(move)
+        scored.append((move, -position_score(ai, board, max(depth - 1, 1))))
+        board.unmake_move(undo)
+    return state, scored
+
+def build(path, plies=8, depth=8, width=2, margin=50, processes=None, verbose=True):
+    # Search every position reached from the start by following, for both
+    #   sides, the width best moves scored within margin of the best move,
+    #   for plies plies. Positions of a ply are searched in parallel.
+    from multiprocessing import Pool
+    entries = {}
+    level = [Bitboard().get_state()]
+    with Pool(processes) as pool:
+        for ply in range(plies):
+            start = time.time()
+            jobs = [(state, depth) for state in level]
+            level = {}
+            for state, scored in pool.starmap(score_moves, jobs):
+                board = Bitboard(state)
+                entries[board.key] = (ply, scored)
+                scored = sorted(scored, key=lambda entry: -entry[1])
+                for move, score in scored[:width]:
+                    if score < scored[0][1] - margin:
+                        break
+                    undo = board.make_move(move)
+                    if board.key not in entries and board.get_moves():
+                        level[board.key] = board.get_state()
+                    board.unmake_move(undo)
+            level = list(level.values())
+            if verbose:
+                print('ply {:>2}: {:>5} positions searched {:>8.1f}s'.format(ply, len(jobs), time.time() - start))
+            if not level:
+                break
+    write(path, entries)
+    if verbose:
+        print('{} positions, {} bytes'.format(len(entries), os.path.getsize(path)))
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Build an opening book from searches of the start position.')
+    parser.add_argument('path')
+    parser.add_argument('--plies', type=int, default=8, help='plies from the start position covered')
+    parser.add_argument('--depth', type=int, default=8, help='search depth of each move')
+    parser.add_argument('--width', type=int, default=2, help='moves followed from each position')
+    parser.add_argument('--margin', type=float, default=50, help='only follow moves scored within this of the best')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: all cores)')
+    args = parser.parse_args()
+    build(args.path, args.plies, args.depth, args.width, args.margin, args.processes)
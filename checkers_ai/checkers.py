@@ -0,0 +1,820 @@
+import random
+
+# Bitboards are plain Python ints masked to 32 bits.
+FULL = 0xffffffff
+
+try:
+    count_bits = int.bit_count
+except AttributeError:
+    def count_bits(bitboard):
+        return bin(bitboard).count('1')
+
+# Diagonal directions. South is towards higher square numbers, the direction
+#   black men move in, north is towards lower square numbers.
+SW, SE, NW, NE = range(4)
+SOUTH, NORTH, ALL_DIRECTIONS = (SW, SE), (NW, NE), (SW, SE, NW, NE)
+
+def build_tables():
+    # Precompute, for every direction and square, the single bit mask of the
+    #   neighbouring square (which is also the square captured by a jump in
+    #   that direction), the jump landing square and the landing square index.
+    #   Squares are numbered 4 per row, even rows are offset one column right.
+    neighbor = [[0] * 32 for d in ALL_DIRECTIONS]
+    landing = [[0] * 32 for d in ALL_DIRECTIONS]
+    landing_square = [[-1] * 32 for d in ALL_DIRECTIONS]
+
+    def square(row, col):
+        if 0 <= row < 8 and 0 <= col < 8:
+            return row * 4 + col // 2
+        return -1
+
+    for sq in range(32):
+        row = sq // 4
+        col = (sq % 4) * 2 + (1 - row % 2)
+        for d, (drow, dcol) in zip(ALL_DIRECTIONS, ((1, -1), (1, 1), (-1, -1), (-1, 1))):
+            one = square(row + drow, col + dcol)
+            two = square(row + 2 * drow, col + 2 * dcol)
+            if one >= 0:
+                neighbor[d][sq] = 1 << one
+            if two >= 0:
+                landing[d][sq] = 1 << two
+                landing_square[d][sq] = two
+    return neighbor, landing, landing_square
+
+NEIGHBOR, LANDING, LANDING_SQUARE = build_tables()
+
+# Zobrist keys, indexed [piece][square] for black men, black kings, white men
+#   and white kings, plus a key for white to move. A fixed seed keeps keys
+#   stable between processes so they can be stored and shared.
+_zobrist_rng = random.Random(0x636b7273)
+ZOBRIST = [[_zobrist_rng.getrandbits(64) for sq in range(32)] for piece in range(4)]
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64)
+
+def zobrist_key(black, white, kings, side):
+    key = ZOBRIST_SIDE if side else 0
+    for piece, bitboard in enumerate((black & ~kings, black & kings, white & ~kings, white & kings)):
+        while bitboard:
+            bit = bitboard & -bitboard
+            bitboard ^= bit
+            key ^= ZOBRIST[piece][bit.bit_length() - 1]
+    return key
+
+# Evaluation terms, kept incrementally by make_move as fields of one packed
+#   int. Each field counts pieces of one side on a set of squares; a piece
+#   contributes TERMS[piece][square], indexed like ZOBRIST, so a move updates
+#   every field with a few additions.
+TERM_BITS = 6
+(BLACK_PIECES, WHITE_PIECES, BLACK_KINGS, WHITE_KINGS, BLACK_ADVANCED, WHITE_ADVANCED,
+        BLACK_CENTER_KINGS, WHITE_CENTER_KINGS, BLACK_BACK_RANK, WHITE_BACK_RANK,
+        BLACK_CORNERS, WHITE_CORNERS) = [i * TERM_BITS for i in range(12)]
+TERM_MASK = 2**TERM_BITS - 1
+
+ADVANCED_MASKS = (0xfffff000, 0x000fffff)
+CENTER_MASK = 0x00666600
+BACK_RANK_MASKS = (0x0000000f, 0xf0000000)
+CORNER_MASK = 0x88000011
+
+def build_terms():
+    terms = [[0] * 32 for piece in range(4)]
+    for piece in range(4):
+        side, king = divmod(piece, 2)
+        for sq in range(32):
+            bit = 1 << sq
+            fields = [(BLACK_PIECES, True), (BLACK_KINGS, king),
+                    (BLACK_ADVANCED, bit & ADVANCED_MASKS[side]),
+                    (BLACK_CENTER_KINGS, king and bit & CENTER_MASK),
+                    (BLACK_BACK_RANK, bit & BACK_RANK_MASKS[side]),
+                    (BLACK_CORNERS, bit & CORNER_MASK)]
+            # White fields follow the matching black field
+            for shift, present in fields:
+                if present:
+                    terms[piece][sq] += 1 << (shift + side * TERM_BITS)
+    return terms
+
+TERMS = build_terms()
+
+def eval_terms(black, white, kings):
+    # Full recount of the packed evaluation terms
+    terms = 0
+    for piece, bitboard in enumerate((black & ~kings, black & kings, white & ~kings, white & kings)):
+        while bitboard:
+            bit = bitboard & -bitboard
+            bitboard ^= bit
+            terms += TERMS[piece][bit.bit_length() - 1]
+    return terms
+
+# Set to check the incremental terms against a full recount on every move
+DEBUG_TERMS = False
+
+def jump_chains(start, square, captured, opponent, empty, directions, jumps):
+    # Extend a jump sequence from square, adding every complete sequence to
+    #   jumps as a bitboard of the start square, captured pieces and final square.
+    extended = False
+    for d in directions:
+        taken = NEIGHBOR[d][square]
+        if taken & opponent and not taken & captured and LANDING[d][square] & empty:
+            extended = True
+            jump_chains(start, LANDING_SQUARE[d][square], captured | taken,
+                    opponent, empty, directions, jumps)
+    if not extended and captured:
+        jumps.add(start | captured | (1 << square))
+
+class Bitboard:
+    # All even row squares can move to the left and all odd row squares
+    #   can move to the right with a bitshift of 4. The following masks define
+    #   squares from which pieces can perform bitshifts of 3 and 5.
+
+    # Even rows: 0x07 -> 0b00000111
+    MASK_SE = 0x07070707 # southeast
+    MASK_NE = 0x07070700 # northeast
+
+    # Odd rows: 0xe0 -> 0b11100000
+    MASK_SW = 0x00e0e0e0 # southwest
+    MASK_NW = 0xe0e0e0e0 # northwest
+
+    BLACK, WHITE = 0, 1
+
+    __slots__ = ('black', 'white', 'kings', 'side', 'key', 'terms')
+
+    def __init__(self, state=None):
+        # State may come from anywhere (numpy scalars included), it is
+        #   converted to plain ints once here.
+        if state:
+            self.black = int(state[0]) & FULL
+            self.white = int(state[1]) & FULL
+            self.kings = int(state[2]) & FULL
+            self.side = int(state[3])
+        else:
+            self.black = 2**12-1
+            self.white = 2**32 - 2**20
+            self.kings = 0
+            self.side = self.BLACK
+        # Zobrist hash of the position and packed evaluation terms, both
+        #   kept up to date by make_move
+        self.key = zobrist_key(self.black, self.white, self.kings, self.side)
+        self.terms = eval_terms(self.black, self.white, self.kings)
+
+    def get_state(self):
+        return (self.black, self.white, self.kings, self.side)
+
+    def copy(self):
+        return Bitboard(self.get_state())
+
+    def get_moves(self):
+        # Construct list of moves, where each move is a bitboard
+        #   containing the current location and the moved location.
+        #   ex. 0x11 = 10001, a piece at 1 and a piece at 1 << 4.
+        #   Movable pieces are found with whole board shifts and read off
+        #   lowest bit first, in the same order as get_moves_reference.
+
+        jumps = self.get_jumps()
+        if jumps:
+            return jumps
+
+        black, white, kings = self.black, self.white, self.kings
+        empty_squares = ~(black | white) & FULL
+        if self.side == self.BLACK:
+            south, north = black, black & kings
+        else:
+            south, north = white & kings, white
+
+        moves = []
+        south_moves = ((4, (empty_squares >> 4) & south),
+                (3, (empty_squares >> 3) & south & self.MASK_SW),
+                (5, (empty_squares >> 5) & south & self.MASK_SE))
+        north_moves = ((4, (empty_squares << 4) & north),
+                (3, (empty_squares << 3) & north & self.MASK_NE),
+                (5, (empty_squares << 5) & north & self.MASK_NW))
+        if self.side == self.BLACK:
+            groups = ((south_moves, 1), (north_moves, -1))
+        else:
+            groups = ((north_moves, -1), (south_moves, 1))
+
+        for shifts, direction in groups:
+            for shift, movable in shifts:
+                while movable:
+                    piece = movable & -movable
+                    movable ^= piece
+                    if direction > 0:
+                        moves.append(piece | piece << shift)
+                    else:
+                        moves.append(piece | piece >> shift)
+        return moves
+
+    def get_jumpers(self):
+        # Bitboard of the pieces of the side to move able to jump, found
+        #   with whole board shifts
+        black, white, kings = self.black, self.white, self.kings
+        empty_squares = ~(black | white) & FULL
+        if self.side == self.BLACK:
+            opponent = white
+            south, north = black, black & kings
+        else:
+            opponent = black
+            south, north = white & kings, white
+
+        takeable = (empty_squares >> 4) & opponent
+        jumpers = south & (((takeable >> 3) & self.MASK_SW) | ((takeable >> 5) & self.MASK_SE)
+                | ((((empty_squares >> 3) & self.MASK_SW) | ((empty_squares >> 5) & self.MASK_SE))
+                    & opponent) >> 4)
+        takeable = (empty_squares << 4) & opponent
+        jumpers |= north & (((takeable << 3) & self.MASK_NE) | ((takeable << 5) & self.MASK_NW)
+                | ((((empty_squares << 3) & self.MASK_NE) | ((empty_squares << 5) & self.MASK_NW))
+                    & opponent) << 4)
+        return jumpers
+
+    def has_moves(self):
+        # Whether the side to move has any move, without generating them
+        black, white, kings = self.black, self.white, self.kings
+        empty_squares = ~(black | white) & FULL
+        if self.side == self.BLACK:
+            south, north = black, black & kings
+        else:
+            south, north = white & kings, white
+        if (((empty_squares >> 4) | ((empty_squares >> 3) & self.MASK_SW) | ((empty_squares >> 5) & self.MASK_SE))
+                & south or ((empty_squares << 4) | ((empty_squares << 3) & self.MASK_NE)
+                | ((empty_squares << 5) & self.MASK_NW)) & north):
+            return True
+        return bool(self.get_jumpers())
+
+    def get_jumps(self):
+        # Find the pieces able to jump, then expand each into its complete
+        #   jump sequences with the lookup tables.
+        jumpers = self.get_jumpers()
+        if not jumpers:
+            return []
+
+        kings = self.kings
+        empty_squares = ~(self.black | self.white) & FULL
+        if self.side == self.BLACK:
+            opponent, forward = self.white, SOUTH
+        else:
+            opponent, forward = self.black, NORTH
+        complete_jumps = set()
+        while jumpers:
+            piece = jumpers & -jumpers
+            jumpers ^= piece
+            directions = ALL_DIRECTIONS if piece & kings else forward
+            jump_chains(piece, piece.bit_length() - 1, 0, opponent, empty_squares,
+                    directions, complete_jumps)
+        return list(complete_jumps)
+
+    def generate_moves(self, first=(), history=None):
+        # Staged, lazy version of get_moves, producing each move only when
+        #   the caller asks for the next one, so a cutoff skips the rest.
+        #   The legal moves among first (hash and killer moves) come first,
+        #   then the jumps of one piece at a time, or if there are none, the
+        #   simple moves one direction at a time as in get_moves. The board
+        #   may be changed between moves as long as it is restored.
+        #
+        # history, a list of 1024 scores indexed by from square * 32 + to
+        #   square, puts the simple moves in order of their scores instead,
+        #   all of them generated at once.
+        black, white, kings = self.black, self.white, self.kings
+        empty_squares = ~(black | white) & FULL
+        if self.side == self.BLACK:
+            own, opponent, forward = black, white, SOUTH
+        else:
+            own, opponent, forward = white, black, NORTH
+        jumpers = self.get_jumpers()
+        done = []
+
+        if jumpers:
+            chains = {}
+            for move in first:
+                piece = move & jumpers
+                if piece and not piece & (piece - 1) and move not in done:
+                    if piece not in chains:
+                        chains[piece] = set()
+                        jump_chains(piece, piece.bit_length() - 1, 0, opponent, empty_squares,
+                                ALL_DIRECTIONS if piece & kings else forward, chains[piece])
+                    if move in chains[piece]:
+                        done.append(move)
+                        yield move
+            while jumpers:
+                piece = jumpers & -jumpers
+                jumpers ^= piece
+                if piece not in chains:
+                    chains[piece] = set()
+                    jump_chains(piece, piece.bit_length() - 1, 0, opponent, empty_squares,
+                            ALL_DIRECTIONS if piece & kings else forward, chains[piece])
+                for move in chains[piece]:
+                    if move not in done:
+                        yield move
+            return
+
+        for move in first:
+            piece, target = move & own, move & empty_squares
+            if (piece and target and piece | target == move and not piece & (piece - 1)
+                    and not target & (target - 1) and move not in done):
+                square = piece.bit_length() - 1
+                if any(NEIGHBOR[d][square] == target for d in (ALL_DIRECTIONS if piece & kings else forward)):
+                    done.append(move)
+                    yield move
+
+        if self.side == self.BLACK:
+            south, north = black, black & kings
+        else:
+            south, north = white & kings, white
+        south_moves = ((4, (empty_squares >> 4) & south),
+                (3, (empty_squares >> 3) & south & self.MASK_SW),
+                (5, (empty_squares >> 5) & south & self.MASK_SE))
+        north_moves = ((4, (empty_squares << 4) & north),
+                (3, (empty_squares << 3) & north & self.MASK_NE),
+                (5, (empty_squares << 5) & north & self.MASK_NW))
+        if self.side == self.BLACK:
+            groups = ((south_moves, 1), (north_moves, -1))
+        else:
+            groups = ((north_moves, -1), (south_moves, 1))
+
+        if history is not None:
+            scored = []
+            for shifts, direction in groups:
+                for shift, movable in shifts:
+                    while movable:
+                        piece = movable & -movable
+                        movable ^= piece
+                        target = piece << shift if direction > 0 else piece >> shift
+                        if piece | target not in done:
+                            scored.append((history[(piece.bit_length() - 1) << 5 | (target.bit_length() - 1)],
+                                    piece | target))
+            scored.sort(reverse=True)
+            for score, move in scored:
+                yield move
+            return
+
+        for shifts, direction in groups:
+            for shift, movable in shifts:
+                while movable:
+                    piece = movable & -movable
+                    movable ^= piece
+                    move = piece | piece << shift if direction > 0 else piece | piece >> shift
+                    if move not in done:
+                        yield move
+
+    def get_moves_reference(self):
+        # Original shift and string based generator, kept to verify get_moves.
+        # Construct list of moves, where each move is a bitboard
+        #   containing the current location and the moved location.
+        #   ex. 0x11 = 10001, a piece at 1 and a piece at 1 << 4.
+
+        jumps = self.get_jumps_reference()
+        if jumps:
+            return jumps
+
+        empty_squares = ~(self.black | self.white) & FULL
+        moves = []
+        if self.side == self.BLACK:
+            movable = (empty_squares >> 4) & self.black
+            moves += [0x11 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+            movable = (empty_squares >> 3) & self.black & self.MASK_SW
+            moves += [0x09 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+            movable = (empty_squares >> 5) & self.black & self.MASK_SE
+            moves += [0x21 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            movable = (empty_squares << 4) & self.black & self.kings
+            moves += [0x11 << bit-4 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+            movable = (empty_squares << 3) & self.black & self.kings & self.MASK_NE
+            moves += [0x09 << bit-3 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+            movable = (empty_squares << 5) & self.black & self.kings & self.MASK_NW
+            moves += [0x21 << bit-5 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            return moves;
+
+        else:
+            movable = (empty_squares << 4) & self.white
+            moves += [0x11 << bit-4 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+            movable = (empty_squares << 3) & self.white & self.MASK_NE
+            moves += [0x09 << bit-3 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+            movable = (empty_squares << 5) & self.white & self.MASK_NW
+            moves += [0x21 << bit-5 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            movable = (empty_squares >> 4) & self.white & self.kings
+            moves += [0x11 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+            movable = (empty_squares >> 3) & self.white & self.kings & self.MASK_SW
+            moves += [0x09 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+            movable = (empty_squares >> 5) & self.white & self.kings & self.MASK_SE
+            moves += [0x21 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            return moves;
+
+    def get_jumps_reference(self):
+        empty_squares = ~(self.black | self.white) & FULL
+        jumps = []
+        if self.side == self.BLACK:
+            kings = self.black & self.kings
+
+            takeable = (empty_squares >> 4) & self.white
+            if takeable:
+                movable = (takeable >> 3) & self.black & self.MASK_SW
+                jumps += [0x89 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+                movable = (takeable >> 5) & self.black & self.MASK_SE
+                jumps += [0x221 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            takeable = (empty_squares >> 3) & self.white & self.MASK_SW
+            if takeable:
+                movable = (takeable >> 4) & self.black
+                jumps += [0x91 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            takeable = (empty_squares >> 5) & self.white & self.MASK_SE
+            if takeable:
+                movable = (takeable >> 4) & self.black
+                jumps += [0x211 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            takeable = (empty_squares << 4) & self.white
+            if takeable:
+                movable = (takeable << 3) & kings & self.MASK_NE
+                jumps += [0x91 << bit-7 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+                movable = (takeable << 5) & kings & self.MASK_NW
+                jumps += [0x211 << bit-9 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            takeable = (empty_squares << 3) & self.white & self.MASK_NE
+            if takeable:
+                movable = (takeable << 4) & kings
+                jumps += [0x89 << bit-7 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            takeable = (empty_squares << 5) & self.white & self.MASK_NW
+            if takeable:
+                movable = (takeable << 4) & kings
+                jumps += [0x221 << bit-9 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            complete_jumps = set()
+            for jump in jumps:
+                complete_jumps.update(self.jump_from(jump))
+            return list(complete_jumps)
+
+        else:
+            takeable = (empty_squares << 4) & self.black
+            if takeable:
+                movable = (takeable << 3) & self.white & self.MASK_NE
+                jumps += [0x91 << bit-7 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+                movable = (takeable << 5) & self.white & self.MASK_NW
+                jumps += [0x211 << bit-9 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            takeable = (empty_squares << 3) & self.black & self.MASK_NE
+            if takeable:
+                movable = (takeable << 4) & self.white
+                jumps += [0x89 << bit-7 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            takeable = (empty_squares << 5) & self.black & self.MASK_NW
+            if takeable:
+                movable = (takeable << 4) & self.white
+                jumps += [0x221 << bit-9 for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            kings = self.white & self.kings
+            takeable = (empty_squares >> 4) & self.black
+            if takeable:
+                movable = (takeable >> 3) & kings & self.MASK_SW
+                jumps += [0x89 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+                movable = (takeable >> 5) & kings & self.MASK_SE
+                jumps += [0x221 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            takeable = (empty_squares >> 3) & self.black & self.MASK_SW
+            if takeable:
+                movable = (takeable >> 4) & kings
+                jumps += [0x91 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            takeable = (empty_squares >> 5) & self.black & self.MASK_SE
+            if takeable:
+                movable = (takeable >> 4) & kings
+                jumps += [0x211 << bit for bit, piece in enumerate(bin(movable)[:1:-1]) if piece == '1']
+
+            complete_jumps = set()
+            for jump in jumps:
+                complete_jumps.update(self.jump_from(jump))
+            return list(complete_jumps)
+
+    def jump_from(self, jump):
+        empty_squares = ~(self.black | self.white) & FULL
+        if self.side == self.BLACK:
+            # Apply jump series to pre jump board state
+            black, white, kings = self.update_board(jump)
+            piece = empty_squares & jump
+            bit = piece.bit_length() - 1
+
+            jumps_from = []
+
+            takeable = (empty_squares >> 4) & white
+            if (takeable >> 3) & piece & self.MASK_SW:
+                jumps_from.append(0x89 << bit)
+            if (takeable >> 5) & piece & self.MASK_SE:
+                jumps_from.append( 0x221 << bit)
+
+            takeable = (empty_squares >> 3) & white & self.MASK_SW
+            if (takeable >> 4) & piece:
+                jumps_from.append(0x91 << bit)
+
+            takeable = (empty_squares >> 5) & white & self.MASK_SE
+            if (takeable >> 4) & piece:
+                jumps_from.append(0x211 << bit)
+
+            if piece & kings:
+                takeable = (empty_squares << 4) & white
+                if (takeable << 3) & piece & self.MASK_NE:
+                    jumps_from.append(0x91 << bit-7)
+                if (takeable << 5) & piece & self.MASK_NW:
+                    jumps_from.append(0x211 << bit-9)
+
+                takeable = (empty_squares << 3) & white & self.MASK_NE
+                if (takeable << 4) & piece:
+                    jumps_from.append(0x89 << bit-7)
+
+                takeable = (empty_squares << 5) & white & self.MASK_NW
+                if (takeable << 4) & piece:
+                    jumps_from.append(0x221 << bit-9)
+
+            if not jumps_from:
+                return [jump]
+            else:
+                jump_sequences = []
+                for j in jumps_from:
+                    #  print('Consecutive jump:' + str([bit for bit, piece in enumerate(bin(j)[:1:-1]) if piece == '1']))
+                    #  print('Sequence:' + str([bit for bit, piece in enumerate(bin((j|jump) & ~piece)[:1:-1]) if piece == '1']))
+                    jump_sequences.extend(self.jump_from((j | jump) & ~piece))
+                return jump_sequences
+        else:
+            black, white, kings = self.update_board(jump)
+
+            # Get the moved piece
+            piece = empty_squares & jump
+            bit = piece.bit_length() - 1
+
+            jumps_from = []
+
+            takeable = (empty_squares << 4) & black
+            if (takeable << 3) & piece & self.MASK_NE:
+                jumps_from.append(0x91 << bit-7)
+            if (takeable << 5) & piece & self.MASK_NW:
+                jumps_from.append(0x211 << bit-9)
+
+            takeable = (empty_squares << 3) & black & self.MASK_NE
+            if (takeable << 4) & piece:
+                jumps_from.append(0x89 << bit-7)
+
+            takeable = (empty_squares << 5) & black & self.MASK_NW
+            if (takeable << 4) & piece:
+                jumps_from.append(0x221 << bit-9)
+
+            if piece & kings:
+                takeable = (empty_squares >> 4) & black
+                if (takeable >> 3) & piece & self.MASK_SW:
+                    jumps_from.append(0x89 << bit)
+                if (takeable >> 5) & piece & self.MASK_SE:
+                    jumps_from.append(0x221 << bit)
+
+                takeable = (empty_squares >> 3) & black & self.MASK_SW
+                if (takeable >> 4) & piece:
+                    jumps_from.append(0x91 << bit)
+
+                takeable = (empty_squares >> 5) & black & self.MASK_SE
+                if (takeable >> 4) & piece:
+                    jumps_from.append(0x211 << bit)
+
+            if not jumps_from:
+                return [jump]
+            else:
+                jump_sequences = []
+                for j in jumps_from:
+                    #  print('Consecutive jump:' + str([bit for bit, piece in enumerate(bin(j)[:1:-1]) if piece == '1']))
+                    #  print('Sequence:' + str([bit for bit, piece in enumerate(bin((j|jump) & ~piece)[:1:-1]) if piece == '1']))
+                    jump_sequences.extend(self.jump_from((j | jump) & ~piece))
+                return jump_sequences
+
+    def format_move(self, move):
+        if self.side == self.BLACK:
+            move_from = (self.black & move).bit_length() - 1
+            if (self.white & move):
+                path =  'x{' + ', '.join([str(bit) for bit, piece in enumerate(bin(self.white & move)[:1:-1]) if piece == '1']) + '}'
+            else:
+                path = '->'
+            move_to = (~(self.black | self.white) & move).bit_length() - 1
+        else:
+            move_from = (self.white & move).bit_length() - 1
+            if (self.black & move):
+                path =  'x{' + ', '.join([str(bit) for bit, piece in enumerate(bin(self.black & move)[:1:-1]) if piece == '1']) + '}'
+            else:
+                path = '->'
+            move_to = (~(self.white | self.black) & move).bit_length() - 1
+
+        return('{!s:>2} {} {!s:<2}'.format(move_from, path, move_to))
+
+    def print_moves(self, moves=None):
+        if not moves:
+            moves = self.get_moves()
+        if self.side == self.BLACK:
+            print('Black\'s turn, possible moves:')
+            for i, move in enumerate(moves):
+                move_from = (self.black & move).bit_length() - 1
+                if (self.white & move):
+                    path =  'x{' + ', '.join([str(bit) for bit, piece in enumerate(bin(self.white & move)[:1:-1]) if piece == '1']) + '}'
+                else:
+                    path = '->'
+                move_to = (~(self.black | self.white) & move).bit_length() - 1
+                print('  {!s:>2}. {!s:>2} {} {!s:<2}'.format(i, move_from, path, move_to))
+        else:
+            print('White\'s turn, possible moves:')
+            for i, move in enumerate(moves):
+                move_from = (self.white & move).bit_length() - 1
+                if (self.black & move):
+                    path =  'x{' + ', '.join([str(bit) for bit, piece in enumerate(bin(self.black & move)[:1:-1]) if piece == '1']) + '}'
+                else:
+                    path = '->'
+                move_to = (~(self.white | self.black) & move).bit_length() - 1
+                print('  {!s:>2}. {!s:>2} {} {!s:<2}'.format(i, move_from, path, move_to))
+
+    def update_board(self, move):
+        # Return a board with the move applied
+        empty_squares = ~(self.black | self.white) & FULL
+        if self.side == self.BLACK:
+            jumped = self.white & move
+            moved_from = self.black & move
+            moved_to = empty_squares & move
+
+            black = (self.black | moved_to) & ~moved_from
+            white = self.white & ~jumped
+
+            # Move kings with jump
+            kings = self.kings & ~moved_from
+            kings = kings & ~jumped
+            if moved_from & self.kings:
+                kings = kings | moved_to
+
+            return (black, white, kings)
+        else:
+            jumped = self.black & move
+            moved_from = self.white & move
+            moved_to = empty_squares & move
+
+            white = (self.white | moved_to) & ~moved_from
+            black = self.black & ~jumped
+
+            # Move kings with jump
+            kings = self.kings & ~moved_from
+            kings = kings & ~jumped
+            if moved_from & self.kings:
+                kings = kings | moved_to
+
+            return (black, white, kings)
+
+    def make_move(self, move):
+        # Apply the move in place and return an undo record for unmake_move
+        undo = (self.black, self.white, self.kings, self.side, self.key, self.terms)
+        black, white, kings = self.update_board(move)
+        # Promote new kings
+        kings |= black & 0xf0000000
+        kings |= white & 0x0000000f
+
+        # Update the hash and evaluation terms from the squares the move touched
+        if self.side == self.BLACK:
+            own, own_after, captured = self.black, black, self.white & ~white
+        else:
+            own, own_after, captured = self.white, white, self.black & ~black
+        piece = self.side * 2
+        moved_from = own & ~own_after
+        moved_to = own_after & ~own
+        before = piece + (1 if moved_from & self.kings else 0)
+        after = piece + (1 if moved_to & kings else 0)
+        moved_from = moved_from.bit_length() - 1
+        moved_to = moved_to.bit_length() - 1
+        key = self.key ^ ZOBRIST_SIDE ^ ZOBRIST[before][moved_from] ^ ZOBRIST[after][moved_to]
+        terms = self.terms - TERMS[before][moved_from]
+        piece = 2 - piece
+        while captured:
+            bit = captured & -captured
+            captured ^= bit
+            taken = piece + (1 if bit & self.kings else 0)
+            bit = bit.bit_length() - 1
+            key ^= ZOBRIST[taken][bit]
+            terms -= TERMS[taken][bit]
+        terms += TERMS[after][moved_to]
+
+        self.black, self.white, self.kings, self.key, self.terms = black, white, kings, key, terms
+        self.side ^= 1
+        if DEBUG_TERMS:
+            assert terms == eval_terms(black, white, kings), 'Incremental evaluation terms differ'
+        return undo
+
+    def unmake_move(self, undo):
+        self.black, self.white, self.kings, self.side, self.key, self.terms = undo
+
+    def is_irreversible(self, move):
+        # Captures and moves of men can never be undone, so no position from
+        #   before them can occur again
+        if self.side == self.BLACK:
+            own, opponent = self.black, self.white
+        else:
+            own, opponent = self.white, self.black
+        return bool(move & (opponent | (own & ~self.kings)))
+
+    def print_board(self, board=None):
+        # termcolor is only needed for display, and is imported here so the
+        #   engine does not load it
+        from termcolor import cprint
+        hchar = '-'
+        vchar = '||'
+        hline = hchar * 7 * 8 + hchar * 4
+        print()
+        cprint(hline, 'blue', 'on_blue')
+        for row in range(8):
+            for cellrow in range(3):
+                cprint(vchar, 'blue', 'on_blue', end='')
+                for col in range(8):
+                    #  print(vchar, end='')
+                    cellnum = (row * 8 + col)
+                    if (row + col) % 2:
+                        square = cellnum // 2
+                        mask = 1 << (square)
+                        if self.black & mask:
+                            piece = 'B'
+                            color = 'red'
+                        elif self.white & mask:
+                            piece = 'W'
+                            color = 'white'
+                        else:
+                            piece = ''
+                            color = 'grey'
+                        if piece and (self.kings & mask):
+                            piece = '{' + piece + '}'
+
+                        if cellrow == 0:
+                            cprint('{:>7}'.format(square), 'green', 'on_grey', end='')
+                        if cellrow == 1:
+                            cprint('{:^7}'.format(piece), color, 'on_grey', end='')
+                        if cellrow == 2:
+                            cprint('{:^7}'.format(''), 'grey', 'on_grey', end='')
+                    else:
+                        if cellrow == 0:
+                            cprint('{:#^7}'.format(''), 'yellow', 'on_yellow', end='')
+                        if cellrow == 1:
+                            cprint('{:#^7}'.format(''), 'yellow', 'on_yellow', end='')
+                        if cellrow == 2:
+                            cprint('{:#^7}'.format(''), 'yellow', 'on_yellow', end='')
+                cprint(vchar, 'blue', 'on_blue')
+        cprint(hline, 'blue', 'on_blue')
+        print()
+
+class GameHistory:
+    # Positions of a game since the last capture or man move, for the draw
+    #   rules: a game is drawn when a position occurs for the third time, or
+    #   after 80 plies without a capture or a man moving.
+    REPETITIONS = 3
+    NO_PROGRESS_PLIES = 80
+
+    def __init__(self, board):
+        # Zobrist keys, the current position's last
+        self.keys = [board.key]
+
+    def play(self, board, move):
+        # Make move on board and record the new position
+        if board.is_irreversible(move):
+            self.keys = []
+        board.make_move(move)
+        self.keys.append(board.key)
+
+    def draw(self):
+        # The draw rule that ends the game, or None
+        if self.keys.count(self.keys[-1]) >= self.REPETITIONS:
+            return 'repetition'
+        if len(self.keys) > self.NO_PROGRESS_PLIES:
+            return 'no progress'
+        return None
+
+def random_state(rng=random):
+    # Random position with up to 12 pieces a side. Men never sit on their
+    #   own promotion row, since they would have been crowned there.
+    squares = rng.sample(range(32), rng.randint(1, 12) + rng.randint(1, 12))
+    nblack = rng.randint(1, len(squares) - 1)
+    black = sum(1 << sq for sq in squares[:nblack])
+    white = sum(1 << sq for sq in squares[nblack:])
+    kings = sum(1 << sq for sq in squares if rng.random() < 0.3)
+    kings |= (black & 0xf0000000) | (white & 0x0000000f)
+    return (black, white, kings, rng.randint(0, 1))
+
+def verify_movegen(positions=10000, seed=None):
+    # Compare the table based generator against the reference generator on
+    #   random positions, raising AssertionError on the first difference.
+    rng = random.Random(seed)
+    for i in range(positions):
+        state = random_state(rng)
+        board = Bitboard(state)
+        moves, reference = sorted(board.get_moves()), sorted(board.get_moves_reference())
+        assert moves == reference, 'Move generators differ for {}: {} != {}'.format(
+                state, moves, reference)
+        staged = sorted(board.generate_moves())
+        assert staged == moves, 'Staged generator differs for {}: {} != {}'.format(
+                state, staged, moves)
+        history = [rng.randrange(100) for square in range(1024)]
+        ordered = list(board.generate_moves(moves[:1], history))
+        assert sorted(ordered) == moves and ordered[:1] == moves[:1], (
+                'History ordered generator differs for {}: {} != {}'.format(state, ordered, moves))
+        assert board.has_moves() == bool(moves), 'has_moves wrong for {}'.format(state)
+    return positions
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Verify the move generator.')
+    parser.add_argument('--verify', type=int, default=10000, metavar='N',
+            help='number of random positions to compare against the reference generator')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    print('{} positions verified'.format(verify_movegen(args.verify, args.seed)))
@@ -1,5 +1,5 @@
-from checkers import Bitboard, count_bits
-from ai import AI
+from .checkers import Bitboard, GameHistory, count_bits
+from .ai import AI
 import time
 
 class Game:
@@ -10,10 +10,12 @@ class Game:
         modes = ['Player vs Player', 'Player vs Computer', 'Computer vs Computer']
         mode = self.prompt('Welcome to checkers! Enter a number to continue.', modes)
         if mode > 0:
-            timelimit = self.prompt('Enter a time limit (<=20s) for the AI:')
+            timelimit = self.prompt('Enter a time limit (1-20s) for the AI:')
             self.ai = AI(timelimit)
+        self.pondering = False
         if mode == 1:
             side = self.prompt('Select a side:', self.side_names)
+            self.pondering = self.prompt('Let the AI think during your turn?', ['No', 'Yes'])
 
         blank = Bitboard((0, 0, 0, 0))
         if self.prompt('Would you like to specify a starting board?', ['No', 'Yes']):
@@ -27,59 +29,99 @@ class Game:
             self.board = Bitboard((black, white, kings & (white | black), side))
         else:
             self.board = Bitboard()
+        self.history = GameHistory(self.board)
 
         check_draws = self.prompt('Enable draw detection (experimental): ', ['No', 'Yes'])
 
         print('New game starting...')
 
-        while (len(self.board.get_moves()) > 0):
-            self.board.print_board()
+        draw = None
+        try:
+            while (len(self.board.get_moves()) > 0):
+                self.board.print_board()
 
-            if mode == 0:
-                self.player_move()
-            elif mode == 1:
-                if side == self.board.side:
+                if mode == 0:
                     self.player_move()
-                else:
+                elif mode == 1:
+                    if side == self.board.side:
+                        self.player_move()
+                    else:
+                        self.ai_move()
+                elif mode == 2:
                     self.ai_move()
-            elif mode == 2:
-                self.ai_move()
-            
-            # Considered a draw if each side has one king and there is no jump
-            if check_draws and self.is_draw():
-                self.board.print_board()
-                return self.prompt('Game ended in a draw.', ['Play again', 'Quit'])
+
+                draw = self.is_draw() if check_draws else None
+                if draw:
+                    break
+        finally:
+            # The player's last move may end the game while the AI ponders
+            #   on it, and no search would stop that
+            if mode > 0:
+                self.ai.stop_ponder()
         self.board.print_board()
+        if draw:
+            return self.prompt('Game ended in a draw by {}.'.format(draw), ['Play again', 'Quit'])
         return self.prompt('{} wins.'.format(self.side_names[~self.board.side]),
                 ['Play again', 'Quit'])
 
     def player_move(self):
+        # The AI searches the player's expected move in the background
+        if self.pondering:
+            self.ai.ponder(self.board, self.history.keys)
         moves = self.board.get_moves()
         i = self.prompt('{}\'s turn, select a move'.format(self.side_names[self.board.side]),
                 [self.board.format_move(m) for m in moves])
-        self.board.make_move(moves[i])
+        self.history.play(self.board, moves[i])
 
     def ai_move(self):
-        print('Finding best move for {}...'.format(self.side_names[self.board.side]))
+        # Each completed iteration is shown as the search finds it, and
+        #   Ctrl-C plays the best move found so far
+        print('Finding best move for {}... (Ctrl-C to move now)'.format(self.side_names[self.board.side]))
         start = time.time()
-        move = self.ai.iddfs(self.board)
+        result = None
+        try:
+            for result in self.ai.iterations(self.board, self.history.keys):
+                if result.depth:
+                    print('  depth {:>2} score {:>8.2f}  {}'.format(result.depth, result.score,
+                            self.format_line(result.pv)))
+        except KeyboardInterrupt:
+            if result is None:
+                raise
+            print('  Stopped at depth', result.depth)
+        move = result.move
         elapsed = time.time() - start
         print('  {} selected move {} in {:.3f}s'.format(self.side_names[self.board.side], self.board.format_move(move), elapsed))
-        self.board.make_move(move)
+        self.history.play(self.board, move)
     
+    def format_line(self, moves):
+        # Moves played one after the other from the current position
+        board = self.board.copy()
+        words = []
+        for move in moves:
+            words.append(board.format_move(move).strip())
+            board.make_move(move)
+        return ', '.join(words)
+
     def is_draw(self):
+        # Reason the game is drawn, or None: a repetition or no progress,
+        #   see GameHistory, or each side having one king and no jump
+        reason = self.history.draw()
+        if reason:
+            return reason
         stuck = False
         if self.board.side == self.board.BLACK:
             stuck = self.board.black & ~0x00181800
         else:
             stuck = self.board.white & ~0x00181800
 
-        return (count_bits(self.board.black) == 1 and 
+        if (count_bits(self.board.black) == 1 and 
                 count_bits(self.board.white) == 1 and 
                 self.board.black & self.board.kings and
                 self.board.white & self.board.kings and
                 len(self.board.get_moves()) > 1 and
-                stuck)
+                stuck):
+            return 'lone kings'
+        return None
 
     def get_custom_board(self):
         self.prompt()
@@ -108,7 +150,8 @@ class Game:
             except ValueError:
                 continue
             if not options:
-                if selection <= 20:
+                # A time limit, 0 would be taken as no limit at all
+                if 0 < selection <= 20:
                     return selection
                 else:
                     continue
@@ -117,9 +160,14 @@ class Game:
             else:
                 continue
 
-game = Game()
-while True:
-    retval = game.new_game()
-    if retval:
-        break
+def main():
+    # Console entry point, plays games until the player quits
+    game = Game()
+    while True:
+        retval = game.new_game()
+        if retval:
+            break
+
+if __name__ == '__main__':
+    main()
 
@@ -0,0 +1,170 @@
+import argparse
+import ast
+import json
+import math
+import random
+import time
+from multiprocessing import Pool
+from .checkers import Bitboard, GameHistory
+from .ai import AI
+
+# Headless engine matches: AI against AI over many games in a process pool,
+#   each opening played twice with the colors swapped. Nothing is printed
+#   during games.
+
+# A game is drawn by the GameHistory rules, a position repeated for the third
+#   time or 80 plies without a capture or a man moving, or at the ply limit
+MAX_PLIES = 400
+
+def parse_options(text):
+    # 'timelimit=0.1,depth=6' -> dict of AI options, values parsed as Python
+    #   literals where possible and kept as strings otherwise
+    options = {}
+    for item in filter(None, text.split(',')):
+        name, value = item.split('=', 1)
+        try:
+            options[name.strip()] = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            options[name.strip()] = value.strip()
+    return options
+
+def openings(count, plies, seed=None):
+    # Start positions reached by plies random moves from the start position,
+    #   all distinct and none of them over
+    rng = random.Random(seed)
+    found = {}
+    for attempt in range(count * 100):
+        if len(found) == count:
+            break
+        board = Bitboard()
+        for ply in range(plies):
+            moves = board.get_moves()
+            if not moves:
+                break
+            board.make_move(rng.choice(moves))
+        if board.get_moves():
+            found.setdefault(board.key, board.get_state())
+    return list(found.values())
+
+def play_game(job):
+    # Plays one game between engines a and b, returns a record of it with
+    #   the result from a's point of view
+    index, state, options_a, options_b, a_side, max_plies = job
+    engines = {a_side: AI(verbose=False, **options_a), a_side ^ 1: AI(verbose=False, **options_b)}
+    board = Bitboard(state)
+    history = GameHistory(board)
+    plies = 0
+    seconds = {a_side: 0.0, a_side ^ 1: 0.0}
+    nodes = {a_side: 0, a_side ^ 1: 0}
+    moved = {a_side: 0, a_side ^ 1: 0}
+    result, reason = 0.5, 'ply limit'
+    try:
+        while plies < max_plies:
+            moves = board.get_moves()
+            if not moves:
+                result, reason = (0.0 if board.side == a_side else 1.0), 'no moves'
+                break
+            ai = engines[board.side]
+            start = time.perf_counter()
+            move = ai.iddfs(board, history.keys)
+            seconds[board.side] += time.perf_counter() - start
+            nodes[board.side] += ai.nodes
+            moved[board.side] += 1
+            if move not in moves:
+                raise RuntimeError('engine returned illegal move {} in {}'.format(move, board.get_state()))
+
+            history.play(board, move)
+            plies += 1
+            if history.draw():
+                reason = history.draw()
+                break
+    finally:
+        for ai in engines.values():
+            ai.close()
+    return dict(game=index, start=state, a_side=a_side, result=result, reason=reason, plies=plies,
+            moves_a=moved[a_side], moves_b=moved[a_side ^ 1], seconds_a=seconds[a_side],
+            seconds_b=seconds[a_side ^ 1], nodes_a=nodes[a_side], nodes_b=nodes[a_side ^ 1])
+
+def elo(wins, draws, losses, z=1.96):
+    # Elo difference of a over b and the bounds of its confidence interval,
+    #   from the mean and standard error of the per game score
+    games = wins + draws + losses
+    score = (wins + draws * .5) / games
+    variance = (wins * (1 - score)**2 + draws * (.5 - score)**2 + losses * score**2) / games
+    error = math.sqrt(variance / games)
+
+    def difference(p):
+        p = min(max(p, 1e-6), 1 - 1e-6)
+        return -400 * math.log10(1 / p - 1)
+    return difference(score), difference(score - z * error), difference(score + z * error)
+
+def match(options_a, options_b, games=100, opening_plies=4, max_plies=MAX_PLIES, processes=None,
+        seed=None, output=None, verbose=True):
+    # Plays games games, two per opening, and returns the game records
+    starts = openings((games + 1) // 2, opening_plies, seed)
+    jobs = []
+    for i in range(games):
+        jobs.append((i, starts[(i // 2) % len(starts)], options_a, options_b, i % 2, max_plies))
+
+    records = []
+    wins = draws = losses = 0
+    log = open(output, 'w') if output else None
+    try:
+        with Pool(processes) as pool:
+            for record in pool.imap_unordered(play_game, jobs):
+                records.append(record)
+                if log:
+                    log.write(json.dumps(record) + '\n')
+                    log.flush()
+                wins += record['result'] == 1
+                draws += record['result'] == .5
+                losses += record['result'] == 0
+                if verbose:
+                    print('\r{:>6} games  +{} ={} -{}'.format(len(records), wins, draws, losses), end='', flush=True)
+    finally:
+        if log:
+            log.close()
+    if verbose:
+        print()
+        report(records)
+    return records
+
+def report(records):
+    wins = sum(r['result'] == 1 for r in records)
+    draws = sum(r['result'] == .5 for r in records)
+    losses = len(records) - wins - draws
+    difference, low, high = elo(wins, draws, losses)
+    print('a vs b: +{} ={} -{}, score {:.1%}'.format(wins, draws, losses, (wins + draws * .5) / len(records)))
+    print('Elo difference {:+.0f}, 95% interval [{:+.0f}, {:+.0f}]'.format(difference, low, high))
+    reasons = {}
+    for r in records:
+        reasons[r['reason']] = reasons.get(r['reason'], 0) + 1
+    print('Game ends: ' + ', '.join('{} {}'.format(reason, n) for reason, n in sorted(reasons.items())))
+    print('{:.1f} plies per game'.format(sum(r['plies'] for r in records) / len(records)))
+    for name in ('a', 'b'):
+        moves = sum(r['moves_' + name] for r in records)
+        seconds = sum(r['seconds_' + name] for r in records)
+        nodes = sum(r['nodes_' + name] for r in records)
+        print('{}: {:.3f}s per move, {:.0f} nodes/s'.format(
+            name, seconds / moves if moves else 0, nodes / seconds if seconds else 0))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play engine matches without a board display.')
+    parser.add_argument('--a', default='', metavar='OPTIONS',
+            help='AI options of engine a, e.g. timelimit=0.1,search=\'pvs\'')
+    parser.add_argument('--b', default='', metavar='OPTIONS', help='AI options of engine b')
+    parser.add_argument('--timelimit', type=float, default=0.1,
+            help='seconds per move of both engines, unless set in their options')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--opening-plies', type=int, default=4, help='random plies played from the start position')
+    parser.add_argument('--max-plies', type=int, default=MAX_PLIES, help='plies after which a game is drawn')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the random openings')
+    parser.add_argument('--output', help='write a JSON line per game to this file')
+    args = parser.parse_args()
+
+    options_a, options_b = parse_options(args.a), parse_options(args.b)
+    options_a.setdefault('timelimit', args.timelimit)
+    options_b.setdefault('timelimit', args.timelimit)
+    match(options_a, options_b, args.games, args.opening_plies, args.max_plies, args.processes,
+            args.seed, args.output)
@@ -0,0 +1,337 @@
+import itertools
+import re
+import sys
+import time
+from .checkers import Bitboard, GameHistory, NEIGHBOR, LANDING_SQUARE, SOUTH, NORTH, ALL_DIRECTIONS, FULL
+from .ai import AI
+
+# Portable Draughts Notation (PDN) games of English draughts.
+#
+# PDN numbers the squares 1 to 32 from black's side, black starting on 1-12
+#   and moving first. Square n is bit n - 1 of the Bitboard layout, so the
+#   double corners are 1, 5 and 28, 32. Moves are written as the squares a
+#   piece passes through, 11-15 for a simple move and 22x15x8 for a jump,
+#   and positions other than the start position as FEN tags such as
+#   [FEN "W:W18,24,K27:B12,16,K22"], the side to move followed by the
+#   pieces of each side, kings prefixed with K.
+#
+# Games are read and written one at a time, so archives of any size can be
+#   streamed.
+
+RESULTS = ('1-0', '0-1', '1/2-1/2', '2-0', '0-2', '1-1', '0-0', '*')
+# Tags written first, in this order, the rest follow in the order given
+TAG_ORDER = ('Event', 'Site', 'Date', 'Round', 'Black', 'White', 'Result')
+
+# Tag pairs, comments (possibly running on to the next lines), rest of line
+#   comments, variation brackets and any other token
+TOKEN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]|\{[^}]*\}?|;|[()]|[^\s(){};\[]+')
+MOVE = re.compile(r'^(?:\d+\.+)?(\d+(?:[-x:]\d+)+)[!?]*$')
+
+class PDNGame:
+    # A game as its tags, the position it starts from (None for the initial
+    #   position) and the move masks played
+    def __init__(self, tags=None, moves=(), start=None):
+        self.tags = dict(tags or {})
+        self.moves = list(moves)
+        self.start = start
+
+    def positions(self):
+        # (state, move played) for every position of the game with a move,
+        #   and the game history of each, as GameHistory keys
+        board = Bitboard(self.start)
+        history = GameHistory(board)
+        for move in self.moves:
+            yield board.get_state(), move, list(history.keys)
+            history.play(board, move)
+
+def parse_fen(text):
+    # (black, white, kings, side) state of a FEN string
+    fields = text.strip().rstrip('.').split(':')
+    if len(fields) != 3 or fields[0].upper() not in ('B', 'W'):
+        raise ValueError('invalid FEN {!r}'.format(text))
+    pieces = {'B': 0, 'W': 0}
+    kings = 0
+    for field in fields[1:]:
+        color, squares = field[:1].upper(), field[1:]
+        if color not in pieces:
+            raise ValueError('invalid FEN {!r}'.format(text))
+        for item in filter(None, squares.split(',')):
+            king = item[:1].upper() == 'K'
+            item = item.lstrip('Kk')
+            first, _, last = item.partition('-')
+            for square in range(int(first), int(last or first) + 1):
+                if not 1 <= square <= 32:
+                    raise ValueError('square {} out of range in FEN {!r}'.format(square, text))
+                pieces[color] |= 1 << (square - 1)
+                if king:
+                    kings |= 1 << (square - 1)
+    if pieces['B'] & pieces['W']:
+        raise ValueError('square of both sides in FEN {!r}'.format(text))
+    if (pieces['B'] & ~kings & 0xf0000000) or (pieces['W'] & ~kings & 0x0000000f):
+        raise ValueError('man on its promotion row in FEN {!r}'.format(text))
+    return pieces['B'], pieces['W'], kings, Bitboard.WHITE if fields[0].upper() == 'W' else Bitboard.BLACK
+
+def format_fen(state):
+    black, white, kings, side = state
+
+    def squares(pieces):
+        return ','.join(('K' if kings >> i & 1 else '') + str(i + 1) for i in range(32) if pieces >> i & 1)
+    return '{}:W{}:B{}'.format('W' if side == Bitboard.WHITE else 'B', squares(white), squares(black))
+
+def move_path(board, move):
+    # PDN squares a move passes through: from and to for a simple move, from
+    #   and every landing square for a jump
+    if board.side == board.BLACK:
+        own, opponent = board.black, board.white
+    else:
+        own, opponent = board.white, board.black
+    piece = move & own
+    start = piece.bit_length() - 1
+    captured = move & opponent
+    if not captured:
+        return [start + 1, (move ^ piece).bit_length()]
+    # A king's jump can end where it started, leaving no landing bit
+    end = (move & ~own & ~opponent) or piece
+    empty = (~(board.black | board.white) & FULL) | piece
+    directions = ALL_DIRECTIONS if piece & board.kings else (SOUTH if board.side == board.BLACK else NORTH)
+
+    def extend(square, remaining):
+        # Landing squares after square that capture exactly remaining
+        if not remaining:
+            return [] if 1 << square == end else None
+        for d in directions:
+            over, to = NEIGHBOR[d][square], LANDING_SQUARE[d][square]
+            if over & remaining and to >= 0 and 1 << to & empty:
+                rest = extend(to, remaining ^ over)
+                if rest is not None:
+                    return [to] + rest
+        return None
+    return [start + 1] + [square + 1 for square in extend(start, captured)]
+
+def format_move(board, move):
+    path = move_path(board, move)
+    separator = 'x' if move & (board.white if board.side == board.BLACK else board.black) else '-'
+    return separator.join(str(square) for square in path)
+
+def parse_move(board, text):
+    # Move mask of a PDN move in the position. A jump may give only its
+    #   first and last squares if that picks out one legal move.
+    match = MOVE.match(text)
+    if not match:
+        raise ValueError('invalid move {!r}'.format(text))
+    squares = [int(square) for square in re.split('[-x:]', match.group(1))]
+    if not all(1 <= square <= 32 for square in squares):
+        raise ValueError('invalid move {!r}'.format(text))
+    own = board.white if board.side == board.WHITE else board.black
+    candidates = []
+    for move in board.get_moves():
+        if move & own == 1 << (squares[0] - 1):
+            path = move_path(board, move)
+            if path[0] == squares[0] and path[-1] == squares[-1]:
+                if path == squares:
+                    return move
+                candidates.append(move)
+    if len(candidates) == 1 and len(squares) == 2:
+        return candidates[0]
+    raise ValueError('{} {!r} in {}'.format('ambiguous move' if candidates else 'illegal move', text,
+            format_fen(board.get_state())))
+
+def tokens(lines):
+    # ('tag', (name, value)) and ('text', token) items of PDN text, with
+    #   comments and escaped lines left out
+    comment = False
+    for line in lines:
+        position = 0
+        if comment:
+            position = line.find('}') + 1
+            if not position:
+                continue
+            comment = False
+        elif line.startswith('%'):
+            continue
+        for match in TOKEN.finditer(line, position):
+            token = match.group()
+            if match.group(1):
+                yield 'tag', (match.group(1), match.group(2).replace('\\"', '"'))
+            elif token == ';':
+                break
+            elif token[0] == '{':
+                comment = not token.endswith('}')
+            else:
+                yield 'text', token
+
+def read_games(lines, strict=True):
+    # Games of PDN text, read lazily from an iterable of lines such as an
+    #   open file. A game with a move that cannot be read or is not legal
+    #   raises ValueError, or with strict False is skipped.
+    tags, words, depth = {}, [], 0
+    number = 0
+    for kind, value in itertools.chain(tokens(lines), [('text', None)]):
+        if kind == 'tag':
+            if words:
+                # A game without a result
+                number += 1
+                game = make_game(number, tags, words, strict)
+                if game:
+                    yield game
+                tags, words, depth = {}, [], 0
+            tags[value[0]] = value[1]
+            continue
+        if value == '(':
+            depth += 1
+        elif value == ')':
+            depth = max(depth - 1, 0)
+        elif depth:
+            continue
+        elif value is None or value in RESULTS:
+            if value:
+                tags.setdefault('Result', value)
+            if tags or words:
+                number += 1
+                game = make_game(number, tags, words, strict)
+                if game:
+                    yield game
+            tags, words = {}, []
+        elif MOVE.match(value):
+            words.append(value)
+
+def make_game(number, tags, words, strict):
+    try:
+        start = parse_fen(tags['FEN']) if 'FEN' in tags else None
+        board = Bitboard(start)
+        moves = []
+        for word in words:
+            move = parse_move(board, word)
+            board.make_move(move)
+            moves.append(move)
+    except ValueError as e:
+        if strict:
+            raise ValueError('{} in game {}'.format(e, number))
+        return None
+    return PDNGame(tags, moves, start)
+
+def write_game(f, game, width=79):
+    # Write a game as PDN, its tags first, then the numbered moves, with
+    #   lines wrapped at width
+    tags = dict(game.tags)
+    tags.setdefault('Result', '*')
+    if game.start is not None:
+        tags['FEN'] = format_fen(game.start)
+    names = [name for name in TAG_ORDER if name in tags] + [name for name in tags if name not in TAG_ORDER]
+    for name in names:
+        f.write('[{} "{}"]\n'.format(name, str(tags[name]).replace('"', '\\"')))
+
+    board = Bitboard(game.start)
+    words = []
+    number = 1
+    for i, move in enumerate(game.moves):
+        if board.side == board.BLACK:
+            words.append('{}.'.format(number))
+        elif i == 0:
+            words.append('{}...'.format(number))
+        words.append(format_move(board, move))
+        if board.side == board.WHITE:
+            number += 1
+        board.make_move(move)
+    words.append(tags['Result'])
+
+    line = ''
+    for word in words:
+        if line and len(line) + 1 + len(word) > width:
+            f.write(line + '\n')
+            line = word
+        else:
+            line = line + ' ' + word if line else word
+    f.write(line + '\n\n')
+
+def analyze_game(job):
+    # Search every position of a game. Returns the game's index and one
+    #   (ply, state, score, best move, move played) tuple per position,
+    #   the score from the side to move's point of view, None for forced
+    #   moves, which are not searched.
+    index, game, options = job
+    ai = AI(verbose=False, **options)
+    results = []
+    for ply, (state, played, history) in enumerate(game.positions()):
+        move = ai.iddfs(Bitboard(state), history)
+        score = ai.score if ai.stats.source == 'search' else None
+        results.append((ply, state, score, move, played))
+    ai.close()
+    return index, results
+
+def analyze(path, options, processes=None, output=sys.stdout, records=None, batch=64, verbose=True):
+    # Search every position of every game of a PDN file across a process
+    #   pool, writing a JSON line per position to output and optionally a
+    #   binary record (see records.py) per position. Games are read and
+    #   sent to the pool batch per process at a time.
+    import json
+    from multiprocessing import Pool
+    from .records import RecordWriter
+    writer = RecordWriter(records) if records else None
+    positions = 0
+    start = time.time()
+    try:
+        with open(path) as f, Pool(processes) as pool:
+            games = enumerate(read_games(f, strict=False))
+            while True:
+                jobs = [(index, game, options) for index, game in itertools.islice(games, batch * (processes or 4))]
+                if not jobs:
+                    break
+                for index, results in pool.imap(analyze_game, jobs):
+                    for ply, state, score, move, played in results:
+                        board = Bitboard(state)
+                        output.write(json.dumps(dict(game=index, ply=ply, fen=format_fen(state), score=score,
+                                best=format_move(board, move) if move else None,
+                                played=format_move(board, played))) + '\n')
+                        if writer:
+                            writer.write(state, score, move)
+                    positions += len(results)
+                if verbose:
+                    print('{} positions, {:.0f} per second'.format(positions, positions / (time.time() - start)),
+                            file=sys.stderr)
+    finally:
+        if writer:
+            writer.close()
+    return positions
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Read, write and analyze PDN game files.')
+    sub = parser.add_subparsers(dest='command')
+    p = sub.add_parser('analyze', help='search every position of every game')
+    p.add_argument('path')
+    p.add_argument('--ai', default='', metavar='OPTIONS', help='AI options, e.g. timelimit=0.1,depth=6')
+    p.add_argument('--timelimit', type=float, default=0.1, help='seconds per position, unless set in --ai')
+    p.add_argument('--processes', type=int, default=None, help='worker processes (default: all cores)')
+    p.add_argument('--output', help='write the JSON lines to this file instead of stdout')
+    p.add_argument('--records', help='also append a binary record per position to this file')
+    p = sub.add_parser('positions', help='write the positions and moves played to a binary record file')
+    p.add_argument('path')
+    p.add_argument('records')
+    p = sub.add_parser('copy', help='read a PDN file and write its games again, checking every move')
+    p.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'analyze':
+        from .match import parse_options
+        options = parse_options(args.ai)
+        options.setdefault('timelimit', args.timelimit)
+        output = open(args.output, 'w') if args.output else sys.stdout
+        try:
+            analyze(args.path, options, args.processes, output, args.records)
+        finally:
+            if args.output:
+                output.close()
+    elif args.command == 'positions':
+        from .records import RecordWriter
+        with open(args.path) as f, RecordWriter(args.records) as writer:
+            for game in read_games(f, strict=False):
+                for state, move, history in game.positions():
+                    writer.write(state, None, move)
+        print('{} positions'.format(writer.count))
+    elif args.command == 'copy':
+        with open(args.path) as f:
+            for game in read_games(f):
+                write_game(sys.stdout, game)
+    else:
+        parser.print_help()
@@ -0,0 +1,91 @@
+import argparse
+import sys
+import time
+from .checkers import Bitboard
+
+# Perft: the number of leaf nodes of the full move tree to a given depth,
+#   for checking the move generator against known counts and timing it.
+#
+# Counts from the start position are the published English draughts perft
+#   values. Counts for the other positions, random positions with multiple
+#   jumps and captures by and of kings, were produced by the table based
+#   generator and agree with the reference generator
+#   (Bitboard.get_moves_reference) to depth 7. Positions are
+#   (black, white, kings, side) states.
+POSITIONS = [
+    ('start', None,
+        [7, 49, 302, 1469, 7361, 36768, 179740, 845931, 3963680, 18391564]),
+    ('multi-jump', (0x3a200ad4, 0x440d5421, 0x300800b1, 0),
+        [1, 8, 13, 79, 357, 1605, 10390, 48942, 343700]),
+    ('king capture', (0x05184210, 0x18028022, 0x08024032, 1),
+        [2, 17, 29, 193, 653, 3905, 25688, 151236, 1190107]),
+    ('king multi-jump', (0x82a11245, 0x5408c098, 0x9088021c, 0),
+        [3, 7, 23, 48, 215, 774, 3902, 17988, 99744]),
+    ('kings endgame', (0x00044001, 0x88800000, 0x88844001, 0),
+        [7, 17, 110, 379, 2267, 9882, 66804, 325694, 2282439]),
+]
+
+def perft(board, depth, generator=Bitboard.get_moves):
+    # Leaf nodes depth plies below board, the last ply counted without
+    #   making the moves
+    if not depth:
+        return 1
+    moves = generator(board)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        undo = board.make_move(move)
+        nodes += perft(board, depth - 1, generator)
+        board.unmake_move(undo)
+    return nodes
+
+def divide(board, depth, generator=Bitboard.get_moves):
+    # Perft of each root move, for finding where two generators differ
+    counts = []
+    for move in generator(board):
+        undo = board.make_move(move)
+        counts.append((move, perft(board, depth - 1, generator)))
+        board.unmake_move(undo)
+    return counts
+
+def run(depth, generator=Bitboard.get_moves, verbose=True):
+    # Perft of every position up to depth, or as deep as its known counts
+    #   go. Returns the list of (name, depth, nodes, expected) mismatches.
+    failures = []
+    total_nodes = total_time = 0
+    for name, state, expected in POSITIONS:
+        board = Bitboard(state)
+        for d in range(1, min(depth, len(expected)) + 1):
+            start = time.perf_counter()
+            nodes = perft(board, d, generator)
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+            ok = nodes == expected[d - 1]
+            if not ok:
+                failures.append((name, d, nodes, expected[d - 1]))
+            if verbose:
+                print('{:<16} {:>2} {:>10} {:>8.3f}s {:>10.0f} nodes/s {}'.format(
+                    name, d, nodes, elapsed, nodes / elapsed if elapsed else 0, 'ok' if ok else
+                    'FAIL, expected {}'.format(expected[d - 1])))
+    if verbose:
+        print('{} nodes in {:.3f}s, {:.0f} nodes/s'.format(
+            total_nodes, total_time, total_nodes / total_time if total_time else 0))
+    return failures
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Count and time the move tree of stored positions.')
+    parser.add_argument('--depth', type=int, default=7, help='deepest perft run on each position')
+    parser.add_argument('--reference', action='store_true', help='use the reference move generator')
+    parser.add_argument('--divide', metavar='POSITION', help='print the perft of each root move of a position')
+    args = parser.parse_args()
+    generator = Bitboard.get_moves_reference if args.reference else Bitboard.get_moves
+
+    if args.divide:
+        states = dict((name, state) for name, state, expected in POSITIONS)
+        board = Bitboard(states[args.divide])
+        for move, nodes in divide(board, args.depth, generator):
+            print('{:<20} {:>10}'.format(board.format_move(move), nodes))
+    else:
+        sys.exit(1 if run(args.depth, generator) else 0)
@@ -0,0 +1,73 @@
+import os
+import struct
+
+# Binary position records: a header followed by fixed size little endian
+#   records of (black, white, kings, side, score, move), written without
+#   numpy and read back as a numpy memmap, so files of millions of positions
+#   load without copying.
+#
+# score is from the side to move's point of view, NaN when the position was
+#   not searched (a forced move). move is the move mask played or found, 0
+#   for none.
+
+MAGIC = b'CKRECS01'
+RECORD = struct.Struct('<IIIBfI')
+
+def dtype():
+    # numpy dtype of a record, matching RECORD
+    import numpy as np
+    return np.dtype([('black', '<u4'), ('white', '<u4'), ('kings', '<u4'), ('side', 'u1'),
+            ('score', '<f4'), ('move', '<u4')])
+
+class RecordWriter:
+    # Appends records to a file, writing the header if it is new
+    def __init__(self, path):
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            with open(path, 'rb') as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError('{} is not a position record file'.format(path))
+        self.file = open(path, 'ab')
+        if not exists:
+            self.file.write(MAGIC)
+        self.count = 0
+
+    def write(self, state, score=None, move=None):
+        black, white, kings, side = state
+        self.file.write(RECORD.pack(black, white, kings, side,
+                float('nan') if score is None else score, move or 0))
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def load(path, mode='r'):
+    # The records of a file as a numpy structured array mapped from disk,
+    #   with fields black, white, kings, side, score and move
+    import numpy as np
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('{} is not a position record file'.format(path))
+    count = (os.path.getsize(path) - len(MAGIC)) // RECORD.size
+    if not count:
+        return np.zeros(0, dtype=dtype())
+    return np.memmap(path, dtype=dtype(), mode=mode, offset=len(MAGIC), shape=(count,))
+
+def iter_records(path):
+    # The records of a file as (state, score, move) tuples, without numpy
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('{} is not a position record file'.format(path))
+        while True:
+            data = f.read(RECORD.size * 4096)
+            data = data[:len(data) - len(data) % RECORD.size]
+            if not data:
+                break
+            for black, white, kings, side, score, move in RECORD.iter_unpack(data):
+                yield (black, white, kings, side), score, move
@@ -0,0 +1,386 @@
+import argparse
+import asyncio
+import collections
+import math
+import multiprocessing
+import os
+import sys
+from .checkers import Bitboard, GameHistory
+from .ai import AI
+
+# Engine server: many games searched by one long running process.
+#
+# Clients talk to it with a line protocol, on stdin/stdout or on a TCP or
+#   Unix socket with one session per connection:
+#
+#   position startpos [moves M ...]     the start position, then moves played
+#   position B W K SIDE [moves M ...]   a (black, white, kings, side) state
+#   go [time S] [nodes N] [depth D] [infinite]
+#                                       search the position
+#   stop                                end the search, answered by its bestmove
+#   isready                             answered by readyok
+#   quit                                close the session
+#
+# Moves are the move masks of Bitboard.get_moves, written as numbers in any
+#   base int() reads with base 0. A search sends an info line for every
+#   completed iteration, with the principal variation it expects, and ends
+#   with one bestmove line, 'bestmove none' when there is no legal move:
+#
+#   info depth 6 score 12.5 nodes 18342 time 0.214 move 4608 pv 4608 ...
+#   bestmove 4608
+#
+# A bad command is answered with an error line and the session stays open.
+#
+# Searches run in a fixed pool of worker processes. Each session has at
+#   most one search queued or running, and searches start in the order
+#   they were asked for, so a busy client cannot hold back the others. A
+#   worker keeps the AI, and so the transposition table, of the last
+#   sessions it searched for, and a session goes back to the worker it
+#   used last when that worker is free.
+
+def worker_process(conn, stop, table_mb, sessions):
+    # Runs searches sent by the server until it sends None. Jobs are
+    #   (job, session, state, history, (timelimit, nodelimit, depth)); the
+    #   replies are ('info', job, line) messages and a last ('bestmove',
+    #   job, move). The search stops early when stop is set.
+    ais = collections.OrderedDict()
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        job, session, state, history, (timelimit, nodelimit, depth) = job
+        ai = ais.pop(session, None) or AI(None, table_mb=table_mb, verbose=False)
+        ais[session] = ai
+        if len(ais) > sessions:
+            ais.popitem(last=False)
+        ai.timelimit, ai.nodelimit, ai.depth = timelimit, nodelimit, depth
+        ai.stop = stop
+        move = None
+        for result in ai.iterations(Bitboard(state), history):
+            move = result.move
+            if result.depth:
+                conn.send(('info', job, 'info depth {} score {} nodes {} time {:.3f} move {} pv {}'.format(
+                        result.depth, round(result.score, 2), result.nodes, result.seconds, result.move,
+                        ' '.join(str(m) for m in result.pv))))
+        conn.send(('bestmove', job, move))
+
+class Session:
+    # One client: its position, the game history leading to it and its
+    #   search. send writes a line to the client.
+    def __init__(self, name, send):
+        self.name = name
+        self.send = send
+        self.board = Bitboard()
+        self.history = GameHistory(self.board)
+        self.closed = False
+        # Id of the search queued or running, and the worker that searched
+        #   for the session last
+        self.job = None
+        self.worker = None
+        # Set while no search is queued or running
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+class Worker:
+    def __init__(self, process, conn, stop):
+        self.process = process
+        self.conn = conn
+        self.stop = stop
+        self.job = None
+
+class EngineServer:
+    def __init__(self, workers=2, timelimit=1, max_time=60, table_mb=16, sessions=8):
+        self.worker_count = workers
+        # Seconds per search when go gives no limit, and the most any
+        #   search may take, infinite ones included, so none can keep a
+        #   worker from the other sessions for long
+        self.timelimit = timelimit
+        self.max_time = max_time
+        # Transposition table size of each AI, and the number of sessions
+        #   whose AI each worker keeps
+        self.table_mb = table_mb
+        self.sessions = sessions
+        self.workers = []
+        self.idle = []
+        # Searches waiting for a worker, (job, session, limits) first come
+        #   first served, and the session of every search not yet answered
+        self.pending = collections.deque()
+        self.jobs = {}
+        self.next_job = self.next_session = 0
+
+    def start(self):
+        # Start the worker processes, called from the event loop
+        self.loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context()
+        for i in range(self.worker_count):
+            conn, child = context.Pipe()
+            stop = context.Event()
+            process = context.Process(target=worker_process,
+                    args=(child, stop, self.table_mb, self.sessions), daemon=True)
+            process.start()
+            child.close()
+            worker = Worker(process, conn, stop)
+            self.loop.add_reader(conn.fileno(), self.receive, worker)
+            self.workers.append(worker)
+            self.idle.append(worker)
+
+    def close(self):
+        # Stop the searches and the worker processes
+        for worker in self.workers:
+            self.loop.remove_reader(worker.conn.fileno())
+            worker.stop.set()
+            worker.conn.send(None)
+        for worker in self.workers:
+            worker.process.join(5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self.workers, self.idle = [], []
+
+    def open_session(self, send):
+        self.next_session += 1
+        return Session(self.next_session, send)
+
+    def close_session(self, session):
+        session.closed = True
+        self.stop(session)
+
+    def command(self, session, line):
+        # Handle one line from a client, False when the session should close
+        words = line.split()
+        if not words:
+            return True
+        name, args = words[0], words[1:]
+        try:
+            if name == 'position':
+                self.position(session, args)
+            elif name == 'go':
+                self.go(session, args)
+            elif name == 'stop':
+                self.stop(session)
+            elif name == 'isready':
+                session.send('readyok')
+            elif name == 'quit':
+                return False
+            else:
+                raise ValueError('unknown command {}'.format(name))
+        except ValueError as e:
+            session.send('error {}'.format(e))
+        return True
+
+    def position(self, session, args):
+        if session.job is not None:
+            raise ValueError('search in progress')
+        if args[:1] == ['startpos']:
+            board, args = Bitboard(), args[1:]
+        else:
+            if len(args) < 4:
+                raise ValueError('position needs startpos or black white kings side')
+            black, white, kings, side = (int(word, 0) for word in args[:4])
+            if black & white or kings & ~(black | white) or side not in (0, 1) or (black | white) >> 32:
+                raise ValueError('invalid position')
+            if (black & ~kings & 0xf0000000) or (white & ~kings & 0x0000000f):
+                raise ValueError('man on its promotion row')
+            board, args = Bitboard((black, white, kings, side)), args[4:]
+        history = GameHistory(board)
+        if args:
+            if args[0] != 'moves':
+                raise ValueError('expected moves, got {}'.format(args[0]))
+            for word in args[1:]:
+                move = int(word, 0)
+                if move not in board.get_moves():
+                    raise ValueError('illegal move {}'.format(word))
+                history.play(board, move)
+        session.board, session.history = board, history
+
+    def go(self, session, args):
+        if session.job is not None:
+            raise ValueError('search in progress')
+        timelimit, nodelimit, depth = self.timelimit, None, None
+        words = iter(args)
+        for word in words:
+            if word == 'infinite':
+                timelimit = None
+            elif word in ('time', 'nodes', 'depth'):
+                value = next(words, None)
+                if value is None:
+                    raise ValueError('{} needs a value'.format(word))
+                try:
+                    number = float(value) if word == 'time' else int(value)
+                except ValueError:
+                    number = None
+                # time 0 completes one iteration, the others have to be
+                #   positive, as 0 would mean no limit to the AI
+                if number is None or not math.isfinite(number) or number < (0 if word == 'time' else 1):
+                    raise ValueError('bad {} {}'.format(word, value))
+                if word == 'time':
+                    timelimit = number
+                elif word == 'nodes':
+                    nodelimit = number
+                else:
+                    depth = number
+            else:
+                raise ValueError('unknown go option {}'.format(word))
+        if self.max_time:
+            timelimit = self.max_time if timelimit is None else min(timelimit, self.max_time)
+
+        self.next_job += 1
+        session.job = self.next_job
+        session.idle.clear()
+        self.jobs[session.job] = session
+        self.pending.append((session.job, session, (timelimit, nodelimit, depth)))
+        self.schedule()
+
+    def stop(self, session):
+        # A running search is stopped and answers with its best move so far,
+        #   one still waiting for a worker with the first legal move
+        if session.job is None:
+            return
+        for entry in self.pending:
+            if entry[0] == session.job:
+                self.pending.remove(entry)
+                moves = session.board.get_moves()
+                self.finish(session.job, moves[0] if moves else None)
+                return
+        session.worker.stop.set()
+
+    def schedule(self):
+        # Hand waiting searches to free workers, oldest first
+        while self.pending and self.idle:
+            job, session, limits = self.pending.popleft()
+            worker = session.worker if session.worker in self.idle else self.idle[0]
+            self.idle.remove(worker)
+            # The worker is free, so no search can miss this
+            worker.stop.clear()
+            worker.job, session.worker = job, worker
+            worker.conn.send((job, session.name, session.board.get_state(), session.history.keys, limits))
+
+    def receive(self, worker):
+        # A message from a worker, called by the event loop
+        kind, job, value = worker.conn.recv()
+        if kind == 'info':
+            session = self.jobs.get(job)
+            if session and not session.closed:
+                session.send(value)
+            return
+        worker.job = None
+        self.idle.append(worker)
+        self.finish(job, value)
+        self.schedule()
+
+    def finish(self, job, move):
+        session = self.jobs.pop(job)
+        session.job = None
+        session.idle.set()
+        if not session.closed:
+            session.send('bestmove {}'.format('none' if move is None else move))
+
+    async def serve_connection(self, reader, writer):
+        # One session per connection. The session ends when the client
+        #   quits or goes away, stopping its search.
+        session = self.open_session(lambda line: writer.write((line + '\n').encode()))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line or not self.command(session, line.decode()):
+                    break
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.close_session(session)
+            writer.close()
+
+    async def serve_stdio(self):
+        # A single session on stdin and stdout. Input is read ahead, so
+        #   commands other than stop, isready and quit wait for the search
+        #   in progress to be answered, as does the end of the input, so
+        #   commands can be piped in.
+        loop = asyncio.get_running_loop()
+        session = self.open_session(lambda line: print(line, flush=True))
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                await session.idle.wait()
+                break
+            if line.split()[:1] not in (['stop'], ['isready'], ['quit']):
+                await session.idle.wait()
+            if not self.command(session, line):
+                break
+        self.close_session(session)
+
+    async def run(self, port=None, path=None, host='127.0.0.1'):
+        # Serve on a Unix socket at path, a TCP port, or stdin/stdout
+        self.start()
+        try:
+            if path:
+                listener = await asyncio.start_unix_server(self.serve_connection, path)
+            elif port is not None:
+                listener = await asyncio.start_server(self.serve_connection, host, port)
+            else:
+                await self.serve_stdio()
+                return
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            self.close()
+
+class Client:
+    # Client stub of the protocol, for tests and scripts
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, port=None, path=None, host='127.0.0.1'):
+        if path:
+            return cls(*await asyncio.open_unix_connection(path))
+        return cls(*await asyncio.open_connection(host, port))
+
+    def send(self, line):
+        self.writer.write((line + '\n').encode())
+
+    async def readline(self):
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError('server closed the connection')
+        return line.decode().rstrip('\n')
+
+    async def search(self, position='startpos', moves=(), **limits):
+        # Sends a position and a go, returns the best move (None if there is
+        #   none) and the info lines. Raises ValueError on an error line.
+        self.send('position {}'.format(position) + ''.join(
+            (' moves ' if i == 0 else ' ') + str(move) for i, move in enumerate(moves)))
+        self.send('go' + ''.join(' {} {}'.format(name, value) for name, value in limits.items()))
+        infos = []
+        while True:
+            line = await self.readline()
+            if line.startswith('info '):
+                infos.append(line)
+            elif line.startswith('bestmove '):
+                move = line.split()[1]
+                return (None if move == 'none' else int(move)), infos
+            elif line.startswith('error '):
+                raise ValueError(line[6:])
+
+    async def close(self):
+        self.send('quit')
+        self.writer.close()
+        await self.writer.wait_closed()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the engine over a line protocol.')
+    parser.add_argument('--port', type=int, help='listen on this TCP port of --host')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--unix', metavar='PATH', help='listen on a Unix socket')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='search processes (default: all cores)')
+    parser.add_argument('--time', type=float, default=1, help='seconds per search when go sets no limit')
+    parser.add_argument('--max-time', type=float, default=60, help='longest any search may run')
+    parser.add_argument('--table-mb', type=int, default=16, help='transposition table size per session')
+    parser.add_argument('--sessions', type=int, default=8, help='sessions whose AI each worker keeps')
+    args = parser.parse_args()
+
+    server = EngineServer(args.workers, args.time, args.max_time, args.table_mb, args.sessions)
+    try:
+        asyncio.run(server.run(args.port, args.unix, args.host))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,87 @@
+class SearchStats:
+    # Measurements of one AI.iddfs call and of each of its iterations.
+    #
+    # Counters kept by the search itself (nodes, quiescence nodes, leaf
+    #   evaluations, beta cutoffs and cutoffs by the first move searched)
+    #   are copied in at the end of every iteration, the rest is worked out
+    #   from them here, outside the search.
+
+    COUNTERS = ('nodes', 'qnodes', 'evaluations', 'cutoffs', 'first_cutoffs', 'tbhits')
+
+    def __init__(self):
+        self.depth = 0
+        self.seconds = 0.0
+        self.move = None
+        self.score = None
+        self.best_move_changes = 0
+        self.helper_nodes = 0
+        self.source = 'search'
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        # One dict per iteration, the last one possibly cut short by the
+        #   limits, in which case its 'completed' is False
+        self.iterations = []
+
+    def add_iteration(self, depth, seconds, counters, move, score, completed=True):
+        # counters: the search's counters at the end of the iteration, in
+        #   COUNTERS order
+        previous = self.iterations[-1] if self.iterations else None
+        iteration = dict(depth=depth, seconds=seconds, completed=completed, move=move, score=score)
+        for name, total in zip(self.COUNTERS, counters):
+            iteration[name] = total - getattr(self, name)
+            setattr(self, name, total)
+        iteration['nps'] = iteration['nodes'] / seconds if seconds else 0.0
+        iteration['first_cutoff_rate'] = (iteration['first_cutoffs'] / iteration['cutoffs']
+                if iteration['cutoffs'] else 0.0)
+        # Growth in nodes from the previous iteration
+        iteration['branching_factor'] = (iteration['nodes'] / previous['nodes']
+                if previous and previous['nodes'] and completed else None)
+        iteration['best_move_changed'] = bool(completed and previous and previous['completed']
+                and move != previous['move'])
+        self.best_move_changes += iteration['best_move_changed']
+        if completed:
+            self.depth, self.move, self.score = depth, move, score
+        self.iterations.append(iteration)
+        return iteration
+
+    @property
+    def nps(self):
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    @property
+    def first_cutoff_rate(self):
+        # Fraction of beta cutoffs caused by the first move searched, a
+        #   measure of move ordering
+        return self.first_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def branching_factor(self):
+        # Effective branching factor, the depth-th root of the nodes searched
+        return self.nodes ** (1 / self.depth) if self.depth and self.nodes else 0.0
+
+    def as_dict(self):
+        result = dict(depth=self.depth, seconds=self.seconds, move=self.move, score=self.score,
+                source=self.source, best_move_changes=self.best_move_changes,
+                helper_nodes=self.helper_nodes, nps=self.nps, first_cutoff_rate=self.first_cutoff_rate,
+                branching_factor=self.branching_factor)
+        for name in self.COUNTERS:
+            result[name] = getattr(self, name)
+        return result
+
+    def write(self, log):
+        # One JSON line per iteration, then one for the whole search. log is
+        #   a file, or the path of one, opened to append and closed again.
+        import json
+        if isinstance(log, str):
+            with open(log, 'a') as f:
+                return self.write(f)
+        for iteration in self.iterations:
+            log.write(json.dumps(dict(iteration, type='iteration')) + '\n')
+        log.write(json.dumps(dict(self.as_dict(), type='search')) + '\n')
+        log.flush()
+
+    def __repr__(self):
+        return ('SearchStats(depth={}, nodes={}, seconds={:.3f}, nps={:.0f}, first_cutoff_rate={:.2f}, '
+                'branching_factor={:.2f}, best_move_changes={})'.format(self.depth, self.nodes,
+                self.seconds, self.nps, self.first_cutoff_rate, self.branching_factor,
+                self.best_move_changes))
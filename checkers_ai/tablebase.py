@@ -0,0 +1,253 @@
+import mmap
+import os
+import time
+from itertools import combinations
+from .checkers import Bitboard, count_bits
+
+# Endgame tablebases built by retrograde analysis.
+#
+# Each material signature (black men, black kings, white men, white kings)
+#   has its own pair of files: name.wdl holds the game theoretic value of
+#   every position packed 4 to a byte, name.dtw the number of plies to the
+#   end of the game for won and lost positions. Values are from the side to
+#   move's point of view, under the engine's own move rules, where a side
+#   with no moves loses. Positions that are never decided are draws.
+#
+# Positions are indexed by the colex rank of each piece set: black men on
+#   squares 0-27, black kings on 0-31, white men on 4-31 and white kings on
+#   0-31, then the side to move. Placements with overlapping pieces are
+#   stored as INVALID.
+
+DRAW, WIN, LOSS, INVALID = 0, 1, 2, 3
+UNKNOWN = 4
+
+BINOMIAL = [[0] * 33 for n in range(33)]
+for n in range(33):
+    BINOMIAL[n][0] = 1
+    for k in range(1, n + 1):
+        BINOMIAL[n][k] = BINOMIAL[n - 1][k - 1] + BINOMIAL[n - 1][k]
+
+def signatures(pieces):
+    # Every signature with a piece on each side and at most pieces pieces,
+    #   in the order they have to be solved: captures lead to fewer pieces
+    #   and promotions to fewer men
+    found = []
+    for total in range(2, pieces + 1):
+        for nblack in range(1, total):
+            for bm in range(nblack + 1):
+                for wm in range(total - nblack + 1):
+                    found.append((bm, nblack - bm, wm, total - nblack - wm))
+    return sorted(found, key=lambda s: (sum(s), s[0] + s[2], s))
+
+def signature_name(signature):
+    return '{}{}{}{}'.format(*signature)
+
+def table_size(signature):
+    bm, bk, wm, wk = signature
+    return BINOMIAL[28][bm] * BINOMIAL[32][bk] * BINOMIAL[28][wm] * BINOMIAL[32][wk] * 2
+
+def rank(bitboard, offset=0):
+    # Colex rank of a set of squares
+    r, i = 0, 1
+    while bitboard:
+        bit = bitboard & -bitboard
+        bitboard ^= bit
+        r += BINOMIAL[bit.bit_length() - 1 - offset][i]
+        i += 1
+    return r
+
+def position_index(black, white, kings, side):
+    # Returns (signature, index)
+    black_men, black_kings = black & ~kings, black & kings
+    white_men, white_kings = white & ~kings, white & kings
+    signature = (count_bits(black_men), count_bits(black_kings),
+            count_bits(white_men), count_bits(white_kings))
+    index = rank(black_men)
+    index = index * BINOMIAL[32][signature[1]] + rank(black_kings)
+    index = index * BINOMIAL[28][signature[2]] + rank(white_men, 4)
+    index = index * BINOMIAL[32][signature[3]] + rank(white_kings)
+    return signature, index * 2 + side
+
+class Tablebase:
+    # Read only access to generated tables through memory mapped files, so
+    #   only the pages actually probed are loaded
+    def __init__(self, directory, pieces=None):
+        self.directory = directory
+        self.tables = {}
+        if pieces is None:
+            names = [name[:-4] for name in os.listdir(directory) if name.endswith('.wdl')]
+            pieces = max([sum(int(c) for c in name) for name in names] or [0])
+        self.pieces = pieces
+        self.probes = 0
+
+    def table(self, signature):
+        if signature not in self.tables:
+            path = os.path.join(self.directory, signature_name(signature))
+            try:
+                with open(path + '.wdl', 'rb') as wdl, open(path + '.dtw', 'rb') as dtw:
+                    self.tables[signature] = (mmap.mmap(wdl.fileno(), 0, access=mmap.ACCESS_READ),
+                            mmap.mmap(dtw.fileno(), 0, access=mmap.ACCESS_READ))
+            except (OSError, ValueError):
+                self.tables[signature] = None
+        return self.tables[signature]
+
+    def lookup(self, black, white, kings, side):
+        # (value, plies) from the side to move's point of view, or None if
+        #   the position is not covered
+        if not (white if side else black):
+            return LOSS, 0
+        # Men on their promotion row cannot occur in play and have no index
+        if (black & ~kings & 0xf0000000) or (white & ~kings & 0x0000000f):
+            return None
+        signature, index = position_index(black, white, kings, side)
+        table = self.table(signature)
+        if table is None:
+            return None
+        self.probes += 1
+        wdl, dtw = table
+        return (wdl[index >> 2] >> ((index & 3) * 2)) & 3, dtw[index]
+
+    def probe(self, board):
+        return self.lookup(board.black, board.white, board.kings, board.side)
+
+    def close(self):
+        for table in self.tables.values():
+            if table:
+                table[0].close()
+                table[1].close()
+        self.tables = {}
+
+def placements(signature):
+    # Every non overlapping (black, white, kings) placement of a signature
+    bm, bk, wm, wk = signature
+    for black_men in combinations(range(28), bm):
+        black_men = sum(1 << sq for sq in black_men)
+        for black_kings in combinations(range(32), bk):
+            black_kings = sum(1 << sq for sq in black_kings)
+            if black_kings & black_men:
+                continue
+            black = black_men | black_kings
+            for white_men in combinations(range(4, 32), wm):
+                white_men = sum(1 << sq for sq in white_men)
+                if white_men & black:
+                    continue
+                for white_kings in combinations(range(32), wk):
+                    white_kings = sum(1 << sq for sq in white_kings)
+                    if white_kings & (black | white_men):
+                        continue
+                    yield black, white_men | white_kings, black_kings | white_kings
+
+def solve(signature, directory):
+    # Solve one signature, all signatures it leads to being already solved
+    start = time.time()
+    solved = Tablebase(directory, pieces=32)
+    size = table_size(signature)
+    values = bytearray([INVALID]) * size
+    distances = bytearray(size)
+
+    # For each undecided position: positions of this signature it leads
+    #   to, and over moves to other signatures the shortest loss for the
+    #   opponent, whether every move wins for the opponent and the longest
+    #   such win
+    internal, shortest_loss, external_all_win, longest_win = {}, {}, {}, {}
+    for black, white, kings in placements(signature):
+        for side in (Bitboard.BLACK, Bitboard.WHITE):
+            index = position_index(black, white, kings, side)[1]
+            board = Bitboard((black, white, kings, side))
+            moves = board.get_moves()
+            if not moves:
+                values[index], distances[index] = LOSS, 0
+                continue
+            values[index] = UNKNOWN
+            children, loss, all_win, win = [], None, True, 0
+            for move in moves:
+                undo = board.make_move(move)
+                child_signature, child = position_index(board.black, board.white, board.kings, board.side)
+                if child_signature == signature:
+                    children.append(child)
+                else:
+                    result = solved.probe(board)
+                    if result is None:
+                        raise RuntimeError('table {} is missing'.format(signature_name(child_signature)))
+                    value, plies = result
+                    if value == LOSS:
+                        loss = plies if loss is None else min(loss, plies)
+                        all_win = False
+                    elif value == WIN:
+                        win = max(win, plies)
+                    else:
+                        all_win = False
+                board.unmake_move(undo)
+            internal[index], shortest_loss[index] = children, loss
+            external_all_win[index], longest_win[index] = all_win, win
+    solved.close()
+
+    # Retrograde passes, one per distance: a position is won in d plies if
+    #   some move leads to a position lost for the opponent in d - 1, and
+    #   lost in d if every move leads to a position won for the opponent and
+    #   the longest of those wins takes d - 1. Positions still undecided
+    #   once no more can be are draws.
+    plies = {}
+    last = max([shortest_loss[i] or 0 for i in internal] + [longest_win[i] for i in internal] + [0])
+    pending = list(internal)
+    distance = 0
+    while pending:
+        distance += 1
+        decided, remaining = [], []
+        for index in pending:
+            children = internal[index]
+            if shortest_loss[index] == distance - 1 or any(values[c] == LOSS and plies.get(c, distances[c]) == distance - 1
+                    for c in children):
+                decided.append((index, WIN))
+            elif (external_all_win[index] and longest_win[index] < distance
+                    and all(values[c] == WIN and plies.get(c, distances[c]) < distance for c in children)):
+                decided.append((index, LOSS))
+            else:
+                remaining.append(index)
+        for index, value in decided:
+            values[index], plies[index] = value, distance
+        if not decided and distance > last:
+            break
+        pending = remaining
+    for index in pending:
+        values[index] = DRAW
+    for index in internal:
+        if values[index] != DRAW:
+            distances[index] = min(plies[index], 255)
+
+    packed = bytearray((size + 3) // 4)
+    for index, value in enumerate(values):
+        packed[index >> 2] |= value << ((index & 3) * 2)
+    path = os.path.join(directory, signature_name(signature))
+    with open(path + '.dtw', 'wb') as f:
+        f.write(distances)
+    with open(path + '.wdl', 'wb') as f:
+        f.write(packed)
+    return signature, size, len(internal) - len(pending), time.time() - start
+
+def generate(directory, pieces, processes=None, verbose=True):
+    # Solve every signature up to pieces pieces. Signatures with the same
+    #   number of pieces and men do not depend on each other and are solved
+    #   in parallel.
+    from multiprocessing import Pool
+    os.makedirs(directory, exist_ok=True)
+    levels = {}
+    for signature in signatures(pieces):
+        levels.setdefault((sum(signature), signature[0] + signature[2]), []).append(signature)
+    with Pool(processes) as pool:
+        for level in sorted(levels):
+            jobs = [(s, directory) for s in levels[level]
+                    if not os.path.exists(os.path.join(directory, signature_name(s) + '.wdl'))]
+            for signature, size, decided, elapsed in pool.starmap(solve, jobs):
+                if verbose:
+                    print('{} {:>10} positions {:>10} decided {:>8.1f}s'.format(
+                        signature_name(signature), size, decided, elapsed))
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Generate endgame tablebases.')
+    parser.add_argument('directory')
+    parser.add_argument('--pieces', type=int, default=4, help='largest number of pieces on the board')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: all cores)')
+    args = parser.parse_args()
+    generate(args.directory, args.pieces, args.processes)
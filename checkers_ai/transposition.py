@@ -0,0 +1,102 @@
+from array import array
+
+class TranspositionTable:
+    # Fixed size hash table of search results, indexed by the low bits of the
+    #   Zobrist key. Entries are kept in parallel typed arrays so the memory
+    #   use is fixed up front and does not grow with the number of nodes.
+    #
+    # A shared table keeps its arrays in shared memory, and can be handed to
+    #   worker processes when they are started. Workers read and write it
+    #   without locks, as in lazy SMP; a torn entry can at worst give a bad
+    #   score or a move the search then finds is not legal and skips.
+
+    # Bound types. Scores are stored from the side to move's point of view.
+    EMPTY, EXACT, LOWER, UPPER = 0, 1, 2, 3
+
+    # Depth stored for subtrees searched to the end of the game, these are
+    #   valid at any search depth.
+    COMPLETE = 127
+
+    # key, move, score, depth, bound, generation
+    TYPECODES = ('Q', 'I', 'd', 'b', 'B', 'B')
+    ENTRY_SIZE = 8 + 4 + 8 + 1 + 1 + 1
+
+    def __init__(self, megabytes=16, shared=False):
+        # Largest power of two number of entries that fits the memory budget
+        size = 1
+        while size * 2 * self.ENTRY_SIZE <= megabytes * 2**20:
+            size *= 2
+        self.size = size
+        self.mask = size - 1
+        self.shared = shared
+        if shared:
+            from multiprocessing.sharedctypes import RawArray
+            buffers = tuple(RawArray(code, size) for code in self.TYPECODES)
+        else:
+            buffers = tuple(array(code, bytes(array(code).itemsize * size)) for code in self.TYPECODES)
+        self.attach(buffers)
+        self.generation = 0
+        self.hits = self.misses = self.stores = self.replacements = 0
+
+    def attach(self, buffers):
+        self.buffers = buffers
+        if self.shared:
+            views = [memoryview(b).cast('B').cast(code) for b, code in zip(buffers, self.TYPECODES)]
+        else:
+            views = buffers
+        self.keys, self.moves, self.scores, self.depths, self.bounds, self.generations = views
+
+    def __getstate__(self):
+        # Only shared tables can be passed to worker processes, and only as
+        #   an argument when the process is started
+        if not self.shared:
+            raise TypeError('only shared transposition tables can be sent to other processes')
+        state = self.__dict__.copy()
+        for name in ('keys', 'moves', 'scores', 'depths', 'bounds', 'generations'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.attach(self.buffers)
+
+    def new_search(self):
+        # Entries from earlier searches are replaced first
+        self.generation = (self.generation + 1) & 0xff
+
+    def probe(self, key):
+        # Returns (depth, bound, score, move) or None
+        i = key & self.mask
+        if self.keys[i] == key and self.bounds[i]:
+            self.hits += 1
+            return self.depths[i], self.bounds[i], self.scores[i], self.moves[i]
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, bound, score, move):
+        # Depth preferred replacement: an entry for another position is only
+        #   overwritten if it is empty, left over from an earlier search, or
+        #   was searched no deeper than the new one.
+        i = key & self.mask
+        if self.bounds[i] and self.keys[i] != key:
+            if self.generations[i] == self.generation and self.depths[i] > depth:
+                return
+            self.replacements += 1
+        self.keys[i] = key
+        self.moves[i] = move
+        self.scores[i] = score
+        self.depths[i] = depth
+        self.bounds[i] = bound
+        self.generations[i] = self.generation
+        self.stores += 1
+
+    def clear(self):
+        if self.shared:
+            self.bounds[:] = bytes(self.size)
+        else:
+            self.bounds[:] = array('B', bytes(self.size))
+        self.hits = self.misses = self.stores = self.replacements = 0
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
@@ -0,0 +1,30 @@
+import random
+import pytest
+from checkers_ai.checkers import Bitboard
+from checkers_ai.ai import AI
+from checkers_ai.bench import playout_states
+
+np = pytest.importorskip('numpy')
+from checkers_ai import batch
+
+def king_endgames(count, seed=0):
+    # Positions of one to five kings, so evaluate takes its endgame branch
+    rng = random.Random(seed)
+    states = []
+    for i in range(count):
+        squares = rng.sample(range(32), rng.randint(2, 5))
+        split = rng.randint(1, len(squares) - 1)
+        black = sum(1 << square for square in squares[:split])
+        white = sum(1 << square for square in squares[split:])
+        states.append((black, white, black | white, rng.randint(0, 1)))
+    return states
+
+def test_evaluate_batch():
+    # evaluate_batch gives AI.evaluate's scores from either perspective
+    states = playout_states(2000) + king_endgames(2000)
+    ai = AI(None, verbose=False)
+    for perspective in (Bitboard.BLACK, Bitboard.WHITE):
+        ai.side = perspective
+        expected = [ai.evaluate(Bitboard(state)) for state in states]
+        scores = batch.evaluate_batch(np.array(states, dtype=np.int64), perspective)
+        assert np.allclose(scores, expected)
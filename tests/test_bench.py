@@ -0,0 +1,8 @@
+from checkers_ai.bench import import_time
+
+def test_lazy_imports():
+    # Importing the engine loads none of the lazily imported modules. The
+    #   time is left to python -m checkers_ai.bench import, as a wall clock
+    #   limit would fail on loaded machines.
+    seconds, loaded = import_time(runs=1)
+    assert not loaded
@@ -0,0 +1,19 @@
+import os
+import tempfile
+from checkers_ai.checkers import Bitboard
+from checkers_ai.book import OpeningBook, build
+
+def test_book_line():
+    # Book moves lead to positions the book expanded, so a line stays in
+    #   the book for as many plies as it was built for, ties included
+    plies = 3
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'book.bin')
+        build(path, plies=plies, depth=2, processes=2, verbose=False)
+        for seed in range(10):
+            book = OpeningBook(path, seed=seed)
+            board = Bitboard()
+            for ply in range(plies):
+                move = book.probe(board, board.get_moves())
+                assert move is not None, ply
+                board.make_move(move)
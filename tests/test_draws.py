@@ -0,0 +1,51 @@
+import importlib.util
+from checkers_ai.checkers import Bitboard, GameHistory
+from checkers_ai.ai import AI
+
+def king_move(board, origin, target):
+    # The legal move of the piece on bit origin to bit target
+    for move in board.get_moves():
+        if move == (1 << origin) | (1 << target):
+            return move
+    raise AssertionError('no move {} -> {}'.format(origin, target))
+
+def test_threefold_repetition():
+    # Two kings moving back and forth repeat the start position a third
+    #   time after two round trips
+    board = Bitboard((1 << 9, 1 << 22, (1 << 9) | (1 << 22), Bitboard.BLACK))
+    history = GameHistory(board)
+    trip = [(9, 13), (22, 18), (13, 9), (18, 22)]
+    for origin, target in trip * 2:
+        assert history.draw() is None
+        history.play(board, king_move(board, origin, target))
+    assert history.draw() == 'repetition'
+
+def test_no_progress():
+    # King moves count towards the no progress rule, a man move starts the
+    #   count again
+    board = Bitboard((1 << 9 | 1 << 4, 1 << 22, (1 << 9) | (1 << 22), Bitboard.BLACK))
+    history = GameHistory(board)
+    for origin, target in [(9, 13), (22, 18), (13, 9), (18, 22)]:
+        history.play(board, king_move(board, origin, target))
+    assert len(history.keys) == 5
+    history.play(board, king_move(board, 4, 8))
+    assert history.keys == [board.key]
+    history.keys = list(range(GameHistory.NO_PROGRESS_PLIES + 1))
+    assert history.draw() == 'no progress'
+
+def test_repetition_scores_draw():
+    # Black is a king up, but every move repeats a position of the game
+    board = Bitboard((1 << 9 | 1 << 0, 1 << 22, (1 << 9) | (1 << 0) | (1 << 22), Bitboard.BLACK))
+    children = []
+    for move in board.get_moves():
+        undo = board.make_move(move)
+        children.append(board.key)
+        board.unmake_move(undo)
+    # batch_eval scores the positions above the horizon with numpy
+    for batch_eval in (False, True) if importlib.util.find_spec('numpy') else (False,):
+        ai = AI(None, depth=2, batch_eval=batch_eval, verbose=False)
+        ai.iddfs(board)
+        assert ai.stats.score > 0
+        ai = AI(None, depth=2, batch_eval=batch_eval, verbose=False)
+        ai.iddfs(board, children)
+        assert ai.stats.score == 0
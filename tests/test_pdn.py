@@ -0,0 +1,37 @@
+import io
+import random
+import pytest
+from checkers_ai.checkers import Bitboard
+from checkers_ai.pdn import PDNGame, parse_fen, format_fen, read_games, write_game
+
+def test_pdn():
+    # Random games round trip through write_game and read_games
+    rng = random.Random(0)
+    games = []
+    for i in range(50):
+        board = Bitboard()
+        moves = []
+        for ply in range(rng.randrange(150)):
+            legal = board.get_moves()
+            if not legal:
+                break
+            moves.append(rng.choice(legal))
+            board.make_move(moves[-1])
+        games.append(PDNGame({'Event': str(i)}, moves))
+    f = io.StringIO()
+    for game in games:
+        write_game(f, game)
+    assert [game.moves for game in read_games(io.StringIO(f.getvalue()))] == [game.moves for game in games]
+
+    text = '''[FEN "W:W18,24,K10:B12,K22"] {a comment
+        over lines} 1... 18-14 (1... 24-19) 22-17 ; to the end of the line
+        2. 14-9 * [Event "illegal"] 1. 11-12 *'''
+    game, = read_games(io.StringIO(text), strict=False)
+    assert game.start == parse_fen('W:WK10,18,24:BK22,12')
+    assert len(game.moves) == 3
+    state = (0x00044001, 0x88800000, 0x88844001, 1)
+    assert parse_fen(format_fen(state)) == state
+    # A man on its promotion row
+    for text in ('B:W6:B29', 'W:W4:BK29'):
+        with pytest.raises(ValueError):
+            parse_fen(text)
@@ -0,0 +1,7 @@
+from checkers_ai.checkers import Bitboard
+from checkers_ai.perft import run
+
+def test_perft():
+    # Shallow run of the perft counts
+    assert run(5, verbose=False) == []
+    assert run(4, Bitboard.get_moves_reference, verbose=False) == []
@@ -0,0 +1,43 @@
+import time
+from checkers_ai.checkers import Bitboard
+from checkers_ai.ai import AI
+from checkers_ai.bench import POSITIONS
+
+def test_lone_kings_depth():
+    # Iterations of small king endgames are nearly free once the table holds
+    #   them, the search has to stop at MAX_DEPTH rather than overflow the
+    #   table's depths
+    for state in ((1, 1 << 31, (1 << 31) | 1, 0), (1 << 9, 1 << 22, (1 << 9) | (1 << 22), 0)):
+        board = Bitboard(state)
+        ai = AI(30, verbose=False)
+        assert ai.iddfs(board) in board.get_moves()
+        assert ai.stats.depth <= AI.MAX_DEPTH
+
+def test_search_agreement():
+    # At a fixed depth PVS, with a wide or a narrow aspiration window, finds
+    #   the score and move of the plain alpha-beta minimax
+    for depth in (3, 4, 5, 6):
+        for state in POSITIONS:
+            results = []
+            for search, window in (('minimax', None), ('pvs', AI.ASPIRATION_WINDOW), ('pvs', 0.5)):
+                ai = AI(None, search=search, depth=depth, verbose=False)
+                ai.ASPIRATION_WINDOW = window
+                move = ai.iddfs(Bitboard(state))
+                results.append((move, ai.stats.score))
+            assert results[1] == results[0] and results[2] == results[0], (depth, state)
+
+def test_node_limit():
+    # The search stops at the node limit and still returns a legal move
+    board = Bitboard(POSITIONS[1])
+    ai = AI(None, nodelimit=1000, verbose=False)
+    assert ai.iddfs(board) in board.get_moves()
+    assert ai.nodes <= 1000
+
+def test_time_limit():
+    # A short time limit is kept to within a tolerance, 0 included
+    board = Bitboard(POSITIONS[1])
+    for timelimit in (0, 0.1, 0.3):
+        ai = AI(timelimit, verbose=False)
+        start = time.time()
+        assert ai.iddfs(board) in board.get_moves()
+        assert time.time() - start < timelimit + 0.2
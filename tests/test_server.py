@@ -0,0 +1,61 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+from checkers_ai.checkers import Bitboard
+from checkers_ai.server import EngineServer, Client
+
+def test_server():
+    # Concurrent sessions on a Unix socket, stop, and errors
+    async def main(path):
+        server = EngineServer(workers=2, table_mb=1)
+        task = asyncio.ensure_future(server.run(path=path))
+        while not os.path.exists(path):
+            await asyncio.sleep(0.01)
+        try:
+            clients = [await Client.connect(path=path) for i in range(4)]
+            board = Bitboard()
+            first = board.get_moves()[0]
+            board.make_move(first)
+            results = await asyncio.gather(*(client.search(moves=[first] * (i % 2), nodes=2000)
+                    for i, client in enumerate(clients)))
+            for i, (move, infos) in enumerate(results):
+                assert move in (board if i % 2 else Bitboard()).get_moves()
+                assert infos
+
+            # A search without limits stops when asked
+            client = clients[0]
+            client.send('position startpos')
+            client.send('go infinite')
+            assert (await client.readline()).startswith('info ')
+            client.send('stop')
+            while not (await client.readline()).startswith('bestmove '):
+                pass
+
+            bad_go = ['go nodes 0', 'go depth 0', 'go nodes -5', 'go depth two', 'go time x', 'go time nan',
+                    'go time -1']
+            for line in ['position startpos moves 1', 'position 0x40000000 0x20 0 0', 'go nodes', 'fly'] + bad_go:
+                client.send(line)
+                assert (await client.readline()).startswith('error ')
+            client.send('isready')
+            assert await client.readline() == 'readyok'
+            for client in clients:
+                await client.close()
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(main(os.path.join(directory, 'engine.sock')))
+
+    # Piped commands on stdin wait for the search before them
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-m', 'checkers_ai.server', '--workers', '1'], cwd=root,
+            input='position startpos\ngo depth 2\nposition startpos moves 4352\ngo depth 2\n',
+            stdout=subprocess.PIPE, universal_newlines=True, timeout=60).stdout.split('\n')
+    assert not [line for line in output if line.startswith('error ')]
+    assert [line for line in output if line.startswith('bestmove ')] == ['bestmove 4352', 'bestmove 2162688']
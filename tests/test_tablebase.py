@@ -0,0 +1,60 @@
+import random
+import tempfile
+import pytest
+from checkers_ai.checkers import Bitboard
+from checkers_ai.ai import AI
+from checkers_ai.tablebase import Tablebase, generate, signatures, placements, WIN, LOSS, DRAW
+
+def test_tablebase():
+    # Every position's value and distance agree with those of its children:
+    #   won in d if the quickest lost child is lost in d - 1, lost in d if
+    #   every child is won and the slowest in d - 1, otherwise drawn. Two
+    #   pieces keep it quick, three take half a minute to generate.
+    with tempfile.TemporaryDirectory() as directory:
+        generate(directory, 2, verbose=False)
+        tables = Tablebase(directory)
+        for signature in signatures(2):
+            for black, white, kings in placements(signature):
+                for side in (Bitboard.BLACK, Bitboard.WHITE):
+                    board = Bitboard((black, white, kings, side))
+                    value, plies = tables.probe(board)
+                    children = []
+                    for move in board.get_moves():
+                        undo = board.make_move(move)
+                        children.append(tables.probe(board))
+                        board.unmake_move(undo)
+                    losses = [d for v, d in children if v == LOSS]
+                    if not children:
+                        assert (value, plies) == (LOSS, 0)
+                    elif losses:
+                        assert (value, plies) == (WIN, min(losses) + 1)
+                    elif all(v == WIN for v, d in children):
+                        assert (value, plies) == (LOSS, max(d for v, d in children) + 1)
+                    else:
+                        assert value == DRAW
+        # Men on their promotion row are not indexed
+        assert tables.lookup(1 << 30, 1 << 5, 0, Bitboard.BLACK) is None
+        assert tables.lookup(1 << 9, 1 << 2, 0, Bitboard.WHITE) is None
+        tables.close()
+
+def test_batch_eval_tablebase():
+    # The batch evaluated frontier scores positions in the tables exactly,
+    #   as the rest of the search does: three piece positions searched two
+    #   plies deep reach two piece positions through captures at the
+    #   frontier
+    pytest.importorskip('numpy')
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        generate(directory, 2, verbose=False)
+        tables = Tablebase(directory)
+        for i in range(300):
+            squares = rng.sample(range(4, 28), 3)
+            black, white = 1 << squares[0], (1 << squares[1]) | (1 << squares[2])
+            state = (black, white, black | white if i % 2 else 0, rng.randint(0, 1))
+            scores = []
+            for batch_eval in (False, True):
+                ai = AI(None, depth=2, tablebase=tables, batch_eval=batch_eval, verbose=False)
+                ai.iddfs(Bitboard(state))
+                scores.append(ai.stats.score)
+            assert scores[0] == scores[1], state
+        tables.close()